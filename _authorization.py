@@ -63,6 +63,7 @@ from bamboolib.helper import (
     log_setup,
     log_error,
     execute_asynchronously,
+    execute_in_daemon_thread,
 )
 from bamboolib.widgets import Button
 
@@ -1089,7 +1090,7 @@ class AuthorizationService:
             pass  # dont start another background update thread
         else:
             self.runs_background_updates = True
-            execute_asynchronously(
+            execute_in_daemon_thread(
                 lambda: self._maybe_perform_continuous_license_updates()
             )
 
@@ -26,6 +26,7 @@ export_transformation_descriptions = true
 undo_levels = 5
 random_seed = 123
 log_errors = false
+use_pyarrow_dtypes = false
 
 [plotly]
 row_limit = 10000
@@ -46,6 +47,7 @@ modifications = []
 # export_transformation_descriptions: Boolean e.g. true
 # undo_levels : int e.g. 1
 # random_seed : int e.g. 123
+# use_pyarrow_dtypes: Boolean e.g. false - cast to pyarrow-backed dtypes where this is faster, e.g. strings and integers with missing values
 #
 # plotly
 # row_limit : int e.g. 10000
@@ -10,6 +10,7 @@ from bamboolib.helper.utils import (
     DF_OLD,
     exec_code,
     execute_asynchronously,
+    execute_in_daemon_thread,
     file_logger,
     get_dataframe_variable_names,
     guess_dataframe_name,
@@ -28,6 +29,8 @@ from bamboolib.helper.utils import (
     replace_code_placeholder,
     return_styled_df_as_widget,
     safe_cast,
+    safe_float,
+    safe_int,
     set_license,
     string_to_code,
     VSpace,
@@ -0,0 +1,9 @@
+# Copyright (c) Databricks Inc.
+# Distributed under the terms of the DB License (see https://databricks.com/db-license-source
+# for more information).
+
+# toPandas() and spark.createDataFrame() are much faster when the data is transferred as Arrow record
+# batches instead of pickled rows. If Arrow cannot be used for some column types, spark falls back to the slow path
+ARROW_CONFIG_CODE = """spark.conf.set("spark.sql.execution.arrow.pyspark.enabled", "true")
+spark.conf.set("spark.sql.execution.arrow.pyspark.fallback.enabled", "true")
+"""
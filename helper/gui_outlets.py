@@ -2,8 +2,10 @@
 # Distributed under the terms of the DB License (see https://databricks.com/db-license-source
 # for more information).
 
+import functools
 import time
 import traceback
+from threading import Timer
 import ipywidgets as widgets
 
 import bamboolib._environment as env
@@ -383,6 +385,7 @@ def show_loader_and_maybe_error_modal(execute_function):
     # async exection enables another feature: the user can abort transformations
     # we implement this via just not accepting the result of the execution any more once it finishes
     # similar to the AutoComplete logic
+    @functools.wraps(execute_function)
     def async_execution(self, *args, **kwargs):
         """
         Execute the `execute_function` asynchronously within a `safe_execution`
@@ -391,8 +394,6 @@ def show_loader_and_maybe_error_modal(execute_function):
         """
         raise_error_if_requirements_are_not_met(self)
 
-        from threading import Timer
-
         delay_in_sec = 0.01
         t = Timer(delay_in_sec, safe_execution, [self, *args], kwargs)
         t.start()
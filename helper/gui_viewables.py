@@ -26,7 +26,7 @@ from bamboolib.helper.gui_outlets import (
     WindowToBeOverriden,
     WindowWithLoaderAndErrorModal,
 )
-from bamboolib.widgets import Text, Button, BrowserCheck
+from bamboolib.widgets import Text, Button, BrowserCheck, Tab
 
 
 def if_new_df_name_is_invalid_raise_error(new_df_name: str) -> None:
@@ -917,8 +917,6 @@ class TabSection(widgets.VBox):
         :param viewable: Viewable that should be added as tab
         :param closable: bool if the user can close/delete the tab e.g. via clicking on the X icon
         """
-        from bamboolib.widgets import Tab
-
         new_tab = Tab(closable=closable)
         outlet = self.main_outlet.get_new_outlet()
         tab_window = TabWindow(self, viewable, new_tab, outlet)
@@ -931,6 +929,8 @@ class TabSection(widgets.VBox):
         """
         :param tab_window: the TabWindow that should be registered at the TabSection
         """
+        if tab_window in self.tab_windows:
+            return  # the tab_window is already registered
         self.tab_windows.append(tab_window)
 
     def df_did_change(self):
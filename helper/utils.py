@@ -12,6 +12,11 @@ import hashlib
 # import analytics  # deactivated via removing import
 import textwrap
 import sys
+import re
+from functools import lru_cache
+import queue
+import threading
+import time
 
 from bamboolib import _environment as env
 from bamboolib.setup.file_logger import file_logger
@@ -20,19 +25,85 @@ import bamboolib.config as config
 
 # Attention: auth cannot be imported here due to circular import dependencies
 # from bamboolib._authorization import auth
+# Use _get_auth() instead which imports auth lazily on its first call
 
 # Some symbols here are imported from gui_outlets
-from bamboolib.widgets import CopyButton, CloseButton, BackButton, Text, Button
+from bamboolib.widgets import (
+    CopyButton,
+    CloseButton,
+    BackButton,
+    Text,
+    Button,
+    BrowserCheck,
+)
+
+
+_auth = None
+
+
+def _get_auth():
+    """
+    Returns the auth object. It is imported on the first call only because importing it at module
+    level leads to circular import dependencies.
+    """
+    global _auth
+    if _auth is None:
+        from bamboolib._authorization import auth
+
+        _auth = auth
+    return _auth
 
 
 DF_OLD = "old_df__bamboolib_template_name"
 DF_NEW = "new_df__bamboolib_template_name"
 
+_PLACEHOLDER_RE = re.compile(f"({re.escape(DF_OLD)}|{re.escape(DF_NEW)})")
+
 QUALTRICS_SURVEY_LINK_HREF = (
     "https://databricks.sjc1.qualtrics.com/jfe/form/SV_0UnuGyKmVO3pNVI"
 )
 
 
+# Those patterns follow the grammar of int() and float() for strings. We use them to reject invalid
+# strings before casting because raising and catching the exception is much more expensive
+_DIGITS_PATTERN = r"\d(?:_?\d)*"
+_INT_RE = re.compile(rf"\s*[+-]?{_DIGITS_PATTERN}\s*")
+_FLOAT_RE = re.compile(
+    rf"\s*[+-]?(?:(?:(?:{_DIGITS_PATTERN})?\.{_DIGITS_PATTERN}|{_DIGITS_PATTERN}\.?)"
+    rf"(?:[eE][+-]?{_DIGITS_PATTERN})?|inf(?:inity)?|nan)\s*",
+    re.IGNORECASE,
+)
+
+
+def _cast_or_default(value, to_type, default):
+    try:
+        return to_type(value)
+    except (ValueError, TypeError):
+        return default
+
+
+def safe_int(value, default=None):
+    """
+    Try to cast value to int. If casting doesn't work, use default value.
+
+    :param value: any basic data type, most likely string.
+    """
+    if isinstance(value, str) and _INT_RE.fullmatch(value) is None:
+        return default
+    return _cast_or_default(value, int, default)
+
+
+def safe_float(value, default=None):
+    """
+    Try to cast value to float. If casting doesn't work, use default value.
+
+    :param value: any basic data type, most likely string.
+    """
+    if isinstance(value, str) and _FLOAT_RE.fullmatch(value) is None:
+        return default
+    return _cast_or_default(value, float, default)
+
+
 def safe_cast(value, to_type, default=None):
     """
     Try to cast value to data type to_type. If casting doesn't work, use default value.
@@ -40,10 +111,11 @@ def safe_cast(value, to_type, default=None):
     :param value: any basic data type, most likely string.
     :param to_type: function used to cast value, e.g. int, float, str, ...
     """
-    try:
-        return to_type(value)
-    except (ValueError, TypeError):
-        return default
+    if to_type is int:
+        return safe_int(value, default)
+    if to_type is float:
+        return safe_float(value, default)
+    return _cast_or_default(value, to_type, default)
 
 
 def list_to_string(list_, quoted=True):
@@ -52,23 +124,53 @@ def list_to_string(list_, quoted=True):
 
     If quoted=True, quote all elements in list explicitely.
     """
-    list_ = [str(item) for item in list_]  # eg this converts boolean lists
+    separator = ", "
     if quoted:
-        list_ = [f"'{item}'" for item in list_]
-    return ", ".join(list_)
+        return separator.join(f"'{item}'" for item in list_)
+    return separator.join(map(str, list_))  # eg this converts boolean lists
+
+
+def _call_and_maybe_log_exception(blocking_function, *args, **kwargs):
+    try:
+        blocking_function(*args, **kwargs)
+    except Exception as exception:
+        # exceptions of background threads would otherwise only be printed to stderr
+        if config.get_option("global.log_errors"):
+            file_logger.error("Exception during asynchronous call", exc_info=exception)
+        raise
 
 
 def execute_asynchronously(blocking_function, *args, **kwargs):
     """
     Enables a function to be called asynchronously (i.e. without blocking the main thread).
+
+    Attention: each call runs in its own daemon thread on purpose. A shared thread pool would queue
+    slow calls (e.g. a stalled Spark query) behind each other and its non-daemon workers are joined
+    at interpreter exit, so a hanging call would block the shutdown of the kernel.
     """
 
     if env.DEACTIVATE_ASYNC_CALLS:
         blocking_function(*args, **kwargs)
     else:
-        from threading import Thread
+        execute_in_daemon_thread(
+            _call_and_maybe_log_exception, blocking_function, *args, **kwargs
+        )
 
-        t = Thread(target=blocking_function, args=args, kwargs=kwargs, daemon=True)
+
+def execute_in_daemon_thread(blocking_function, *args, **kwargs):
+    """
+    Enables a long-running function to be called asynchronously in its own daemon thread.
+
+    Use this for functions that might run forever, e.g. background loops, so that they do not
+    block the shutdown of the interpreter.
+    """
+
+    if env.DEACTIVATE_ASYNC_CALLS:
+        blocking_function(*args, **kwargs)
+    else:
+        t = threading.Thread(
+            target=blocking_function, args=args, kwargs=kwargs, daemon=True
+        )
         t.start()
 
 
@@ -121,8 +223,7 @@ def activate_license(email="", key="", _notification_embeddable=None):
     :return: ipywidgets.VBox containing all input widgets and submit button.
     """
 
-    from bamboolib._authorization import auth
-    from bamboolib.widgets import Text, BrowserCheck
+    auth = _get_auth()
 
     click_here_for_a_trial_license = """<a href="https://bamboolib.8080labs.com/trial/" target=_blank class="bamboolib-link">Click here</a> for a trial license."""
     header = widgets.HTML(
@@ -207,6 +308,9 @@ def get_dataframe_variable_names(df, symbols) -> list:
 
     :return: list with the variable names that point to df.
     """
+    # Attention: we do not cache an index of the symbols because there is no public version of a dict
+    # A variable that is rebound to df (e.g. df2 = df) changes neither the dict nor its length
+    # and thus only a full scan finds all names
     return [
         key for key in symbols.keys() if df is symbols[key] and not key.startswith("_")
     ]
@@ -230,7 +334,7 @@ def guess_dataframe_name(df: pd.DataFrame, symbols) -> str:
 
 def _get_user_id(email=None, key=None):
     """Get the ID of our user."""
-    from bamboolib._authorization import auth
+    auth = _get_auth()
 
     if email is None:
         email = auth.get_user_email()
@@ -248,7 +352,6 @@ def maybe_message_segment(message, details={}):
 
     if config.is_in_confidential_mode():
         return
-    from bamboolib._authorization import auth
 
     user_id = _get_user_id()
     # analytics.track(user_id, message, details)  # deactivated via removing import
@@ -272,6 +375,11 @@ def maybe_identify_segment(email, key):
     # )
 
 
+def _is_logging_active():
+    """Returns True if log records are sent to segment or displayed for debugging."""
+    return env.LOG_USER_BEHAVIOR or env.DEBUG_LOGS
+
+
 def log_base(
     class_,
     category="No category",
@@ -292,7 +400,11 @@ def log_base(
         overwrite it by the name of the class that is logged.
     :param action: string. The action that is logged, e.g. "filter", "drop columns", "click 'Show static HTML' button".
     """
-    from bamboolib._authorization import auth
+    if not _is_logging_active():
+        # skip assembling the log record because nobody would receive it
+        return
+
+    auth = _get_auth()
     from bamboolib import __version__ as version
 
     if not isinstance(view, str):
@@ -314,7 +426,8 @@ def log_base(
     # all < fine < rough < critical < none  # may be tuned via license?
     kwargs["log_level"] = level
 
-    kwargs["local_datetime"] = str(datetime.datetime.now())
+    # the timestamp is formatted later in _finish_log_record in order to keep log_base cheap
+    kwargs["local_datetime"] = time.time()
 
     # general information about the user and the bamboolib setup
 
@@ -323,11 +436,38 @@ def log_base(
     kwargs["license_type"] = auth.get_license_type()
     kwargs["license_logic"] = auth.get_license_logic()
     kwargs["version"] = version
+
+    if env.DEACTIVATE_ASYNC_CALLS or env.DEBUG_LOGS:
+        # debug logs are displayed in the current cell, so we cannot finish them in the background
+        _finish_log_record(class_, kwargs)
+    else:
+        _enqueue_log_record(class_, kwargs)
+
+
+_log_queue = queue.Queue()
+_log_worker_lock = threading.Lock()
+_log_worker_is_running = False
+
+
+@lru_cache(maxsize=None)
+def _get_machine_hash():
+    """The machine hash does not change during a session, so we calculate it only once."""
     # fingerprint is calculcated inline because we dont want to expose the calculation
-    user_path = Path.home()
-    os_platform = sys.platform
-    fingerprint = f"{os_platform};;;{user_path}"
-    kwargs["machine_hash"] = hashlib.md5(fingerprint.encode()).hexdigest()[:10]
+    fingerprint_bytes = f"{sys.platform};;;{Path.home()}".encode()
+    return hashlib.md5(fingerprint_bytes).digest().hex()[:10]
+
+
+def _finish_log_record(class_, kwargs):
+    """
+    Complete a log record that was assembled by log_base and dispatch it.
+
+    This is the expensive part of logging and thus it usually runs in the background log worker.
+    """
+    kwargs["local_datetime"] = str(
+        datetime.datetime.fromtimestamp(kwargs["local_datetime"])
+    )
+
+    kwargs["machine_hash"] = _get_machine_hash()
 
     maybe_message_segment(class_, kwargs)
 
@@ -335,8 +475,31 @@ def log_base(
         display({class_: kwargs})  # for debug
 
 
+def _process_log_queue():
+    """Consume the log queue forever. Runs in a single daemon thread to preserve the log order."""
+    while True:
+        class_, kwargs = _log_queue.get()
+        try:
+            _finish_log_record(class_, kwargs)
+        except Exception:
+            pass  # logging must never break the user's workflow
+        finally:
+            _log_queue.task_done()
+
+
+def _enqueue_log_record(class_, kwargs):
+    """Hand a log record over to the background log worker and start the worker if necessary."""
+    global _log_worker_is_running
+
+    _log_queue.put((class_, kwargs))
+    with _log_worker_lock:
+        if not _log_worker_is_running:
+            _log_worker_is_running = True
+            execute_in_daemon_thread(_process_log_queue)
+
+
 def log_databricks_funnel_event(description):
-    from bamboolib._authorization import auth
+    auth = _get_auth()
 
     can_log = env.DBUTILS is not None
     if can_log and auth.is_databricks():
@@ -372,6 +535,12 @@ def log_jupyter_action(*args, **kwargs):
     log_base("jupyter_action_v1", *args, **kwargs)
 
 
+_STYLED_TABLE_OPEN = (
+    "<div class='jp-RenderedHTMLCommon jp-RenderedHTML'><table class='rendered_html'"
+)
+_STYLED_TABLE_CLOSE = "</table></div>"
+
+
 def return_styled_df_as_widget(styled_df):
     """
     Return a styled pandas DataFrame as an ipywidgets.
@@ -381,17 +550,13 @@ def return_styled_df_as_widget(styled_df):
     :return: ipywidgets.HTML
     """
     # add CSS classes so that the normal Jupyter styles will be applied
-
-    # class for Jupyter Notebook
-    output_html = styled_df._repr_html_().replace(
-        "<table", "<table class='rendered_html'"
-    )
-
-    # classes for Jupyter Lab including additional div because Lab has another hierarchy
-    output_html = output_html.replace(
-        "<table", "<div class='jp-RenderedHTMLCommon jp-RenderedHTML'><table"
-    )
-    output_html = output_html.replace("</table>", "</table></div>")
+    # - class rendered_html for Jupyter Notebook
+    # - classes for Jupyter Lab including additional div because Lab has another hierarchy
+    # A styled DataFrame renders a single table, so we only replace the first occurrence of each
+    # tag which avoids multiple full passes over the (potentially large) HTML string
+    output_html = styled_df._repr_html_()
+    output_html = output_html.replace("<table", _STYLED_TABLE_OPEN, 1)
+    output_html = output_html.replace("</table>", _STYLED_TABLE_CLOSE, 1)
     return widgets.HTML(output_html)
 
 
@@ -404,11 +569,17 @@ def replace_code_placeholder(code, old_df_name=None, new_df_name=None):
 
     :return: string. The code with the placeholders being replaced.
     """
-    if old_df_name is not None:
-        code = code.replace(DF_OLD, old_df_name)
-    if new_df_name is not None:
-        code = code.replace(DF_NEW, new_df_name)
-    return code
+    if DF_OLD not in code and DF_NEW not in code:
+        return code
+
+    def replace(match):
+        placeholder = match.group(0)
+        if placeholder == DF_NEW:
+            return placeholder if new_df_name is None else new_df_name
+        return placeholder if old_df_name is None else old_df_name
+
+    # single pass over the code instead of one str.replace per placeholder
+    return _PLACEHOLDER_RE.sub(replace, code)
 
 
 def exec_code(
@@ -462,6 +633,9 @@ def string_to_code(string):
     because our default code export for string lists is handled by python's string interpolation and that uses single quotes e.g. "['a', 'b']"
     Later, we might change that to double quotes if we also write our own list_to_code function that handles string lists with double quotes
     """
+    if "\\" not in string and "'" not in string:
+        return f"'{string}'"  # fast path: nothing needs to be escaped
+
     # escape backspaces
     # assumption: backspace is used as a literal and not as escape character
     # thus we need to escape it in order to prevent the interpretation as escape character by python
@@ -501,7 +675,7 @@ def set_license(encrypted_string):
     set_license(<content of ~/.bamboolib/LICENSE>), e.g.
     set_license("yhhekh...hfkljeh")
     """
-    from bamboolib._authorization import auth
+    auth = _get_auth()
 
     auth.set_license(encrypted_string)
 
@@ -2,33 +2,295 @@
 # Distributed under the terms of the DB License (see https://databricks.com/db-license-source
 # for more information).
 import sys
+import time
+from functools import lru_cache
 
 import ipywidgets as widgets
-from threading import Thread
+from concurrent.futures import Future
+from threading import Lock, Thread
 
-from bamboolib.helper import notification, safe_cast
+from bamboolib import _environment as env
+from bamboolib.helper import execute_in_daemon_thread, notification, safe_cast
+from bamboolib.helper.databricks import ARROW_CONFIG_CODE
 from bamboolib.plugins import LoaderPlugin, DF_NEW, Text, BamboolibError
 from bamboolib.widgets import Singleselect, CopyButton, CodeOutput
 
-try:
-    # We expect this to fail in testing & outside databricks
-    from pyspark.sql import SparkSession
-except ModuleNotFoundError:
-    _spark = None
-else:
-    _spark = SparkSession.getActiveSession()
+
+def _get_spark():
+    """
+    Returns the active SparkSession or None. The session is cached.
+
+    Attention: we don't check here if the cached session was stopped because this requires a
+    request to the JVM. Use _call_with_spark for spark calls so that a stopped session is replaced.
+    """
+    return _get_cached_spark()
+
+
+def _call_with_spark(spark_function):
+    """
+    Calls spark_function with the cached SparkSession. If the call fails because the session was stopped,
+    e.g. because the notebook was detached and reattached to the cluster, we retry once with the active session.
+
+    :param spark_function: function that takes the SparkSession as argument.
+    """
+    spark = _get_spark()
+    try:
+        return spark_function(spark)
+    except Exception:
+        if spark is None or not _is_stopped(spark):
+            raise
+        _clear_cached_spark()
+        spark = _get_spark()
+        if spark is None:
+            raise
+        return spark_function(spark)
+
+
+def _is_stopped(spark):
+    try:
+        return spark._jsc.sc().isStopped()
+    except AttributeError:
+        return False  # e.g. Spark Connect sessions don't have a JVM SparkContext
+    except Exception:
+        return True  # most likely, the connection to the JVM is broken
+
+
+_cached_spark = None
+
+
+def _get_cached_spark():
+    """
+    pyspark is imported lazily because the import is slow and this module is imported during the
+    plugin registration even if the user never opens this loader.
+
+    Attention: we only cache a found session but not None because this module might be imported
+    before the SparkSession exists, e.g. during the plugin registration when the cluster is attached
+    """
+    global _cached_spark
+    if _cached_spark is None:
+        try:
+            # We expect this to fail in testing & outside databricks
+            from pyspark.sql import SparkSession
+        except ModuleNotFoundError:
+            return None
+        _cached_spark = SparkSession.getActiveSession()
+    return _cached_spark
+
+
+def _clear_cached_spark():
+    global _cached_spark
+    _cached_spark = None
+
 
 DATABASE_DOES_NOT_EXIST = "DATABASE_DOES_NOT_EXIST"
+DATABASE_NOT_LISTED = object()
 ROW_LIMIT_DEFAULT = 100_000
 
+
+@lru_cache(maxsize=32)
+def _row_limit_int(row_limit_value):
+    """
+    Parse the value of a row limit input. The result is cached because get_code is called often
+    and there are only few distinct values in practice.
+    """
+    return safe_cast(row_limit_value, int, ROW_LIMIT_DEFAULT)
+
+
+@lru_cache(maxsize=16)
+def _row_limit_code(row_limit_value):
+    """
+    :return: str with the code that limits the rows or an empty str if the user wants no limit
+    """
+    if row_limit_value == "":
+        return ""
+    row_limit_int = _row_limit_int(row_limit_value)
+    if row_limit_int <= 0:
+        return ""
+    return f".limit({row_limit_int})"
+
+
 READ_THE_FIRST = "Read the first"
 RANDOMLY_SAMPLE = "Randomly sample"
 READ_THE_LAST = "Read the last"
 
+# Listing catalogs, databases and tables requires slow metastore requests. Thus, we cache the
+# results across loader instances but only for a short time so that the user sees new tables soon
+METADATA_CACHE_TTL_SECONDS = 60
+
+
+@lru_cache(maxsize=128)
+def _cached_sql(query, column, ttl_bucket):
+    """
+    Execute the metadata query and return the values of the given column as tuple.
+
+    :param ttl_bucket: int that changes every METADATA_CACHE_TTL_SECONDS which invalidates the cache
+    """
+    # we only select the needed column so that less data is transferred
+    # Attention: we don't use toLocalIterator because it runs a separate spark job per partition
+    def get_values(spark):
+        rows = spark.sql(query).select(column).collect()
+        # remove duplicates (e.g. seen in Unity Catalog) while keeping the order of the result
+        return tuple(dict.fromkeys(row[0] for row in rows))
+
+    return _call_with_spark(get_values)
+
+
+def _quote_identifier(name):
+    """
+    Quote a catalog or database name for a metadata query. This way, the query is the same for each
+    name, and names with special characters (e.g. hyphens) don't break the query.
+    """
+    escaped_name = name.replace("`", "``")
+    return f"`{escaped_name}`"
+
+
+def _list_metadata(query, column):
+    """
+    :return: list of str with the values of the column in the (cached) result of the query
+    """
+    ttl_bucket = int(time.time() // METADATA_CACHE_TTL_SECONDS)
+    return list(_cached_sql(query, column, ttl_bucket))
+
+
+# incremented whenever the metadata cache is cleared. The loaders remember the generation of their
+# listed tables, so they list the tables again after the cache was cleared even if the selection is the same
+_metadata_cache_generation = 0
+
+
+def _clear_metadata_cache():
+    """Use this when the cached metadata seems to be outdated, e.g. a database was deleted"""
+    global _metadata_cache_generation
+    _cached_sql.cache_clear()
+    _metadata_cache_generation += 1
+
+
+DATABASE_NOT_FOUND_ERROR_SNIPPETS = (
+    "NoSuchDatabaseException",
+    "SCHEMA_NOT_FOUND",
+    "Database not found",
+)
+
+
+def _is_database_not_found_error(exception):
+    """
+    :return: bool if the exception was raised by spark because the database does not exist.
+    """
+    message = f"{exception.__class__.__name__}: {exception}"
+    if any(snippet in message for snippet in DATABASE_NOT_FOUND_ERROR_SNIPPETS):
+        return True
+    # e.g. "Database 'my_database' not found"
+    return "Database '" in message and "' not found" in message
+
+
+DEBOUNCE_DELAY_IN_SEC = 0.15
+
+
+class _Debouncer:
+    """
+    Calls `function` once it was not called again for delay_in_sec.
+
+    There is at most one worker thread per debouncer and it only lives while calls are pending.
+    Every new call moves the deadline and replaces the arguments, so only the latest call is executed.
+    Thus, the function is never executed concurrently by the same debouncer.
+    """
+
+    def __init__(self, function, delay_in_sec):
+        self._function = function
+        self._delay_in_sec = delay_in_sec
+        self._lock = Lock()
+        self._pending_call = None
+        self._deadline = None
+        self._worker = None
+
+    def __call__(self, *args, **kwargs):
+        if env.DEACTIVATE_ASYNC_CALLS:
+            self._function(*args, **kwargs)
+            return
+
+        with self._lock:
+            self._pending_call = (args, kwargs)
+            self._deadline = time.monotonic() + self._delay_in_sec
+            if self._worker is None:
+                self._worker = Thread(target=self._run, daemon=True)
+                self._worker.start()
+
+    def _run(self):
+        while True:
+            with self._lock:
+                if self._pending_call is None:
+                    self._worker = None
+                    return
+                remaining_sec = self._deadline - time.monotonic()
+                if remaining_sec <= 0:
+                    args, kwargs = self._pending_call
+                    self._pending_call = None
+            if remaining_sec > 0:
+                time.sleep(remaining_sec)
+                continue
+
+            try:
+                self._function(*args, **kwargs)
+            except BaseException:
+                # the next call needs to start a new worker
+                with self._lock:
+                    self._worker = None
+                raise
+
+
+def _debounced(function, delay_in_sec=DEBOUNCE_DELAY_IN_SEC):
+    """
+    Returns a function that only calls `function` once it was not called again for delay_in_sec.
+    Use it to coalesce bursts of on_change events, e.g. when the user clicks through the options.
+    """
+    return _Debouncer(function, delay_in_sec)
+
+
+def _submit_to_daemon_thread(function, *args):
+    """
+    Runs function in its own daemon thread and returns a Future with its result.
+
+    Attention: we don't use a thread pool because its workers are joined at interpreter exit,
+    so a stalled spark request would block the shutdown of the kernel. In addition, a slow request
+    would hold up the requests of all other loaders.
+    The exception of function is stored in the Future, so the caller has to read the result.
+    """
+    future = Future()
+
+    def run():
+        if not future.set_running_or_notify_cancel():
+            return  # the future was cancelled before the thread started
+        try:
+            result = function(*args)
+        except BaseException as exception:
+            future.set_exception(exception)
+        else:
+            future.set_result(result)
+
+    execute_in_daemon_thread(run)
+    return future
+
+
+def _get_result_or_none(future):
+    try:
+        return future.result()
+    except Exception:
+        return None
+
+
 class NonUCDatabaseLoader(widgets.VBox):
-    def __init__(self, transformation):
+    def __init__(self, transformation, prefetched_databases=None, prefetched_tables=None):
+        """
+        :param prefetched_databases: None or Future with the list of databases.
+            If given, the databases are not listed again
+        :param prefetched_tables: None or Future with the list of tables of the default database.
+            If given, the tables are not listed again
+        """
         super().__init__()
         self.transformation = transformation
+        self._notifications = _NotificationCache()
+        # (database, metadata cache generation) whose tables are currently listed
+        # Uses a sentinel because None is the default database
+        self._last_listed_database = DATABASE_NOT_LISTED
 
         self.database = Singleselect(
             placeholder="Database - leave empty for default database",
@@ -53,8 +315,8 @@ class NonUCDatabaseLoader(widgets.VBox):
             execute=self.transformation,
         )
 
-        for target in (self._update_databases, self._update_tables):
-            Thread(target=target).start()
+        self._update_in_background(self._update_databases, prefetched_databases)
+        self._update_in_background(self._update_tables, prefetched_tables)
 
         self.children = [
             create_description_widget("Database"),
@@ -72,35 +334,62 @@ class NonUCDatabaseLoader(widgets.VBox):
             self.transformation.execute_button,
         ]
 
-    def _update_databases(self):
-        self.database.options = self._list_databases()
+    def _update_in_background(self, update, prefetched_future):
+        if prefetched_future is None:
+            execute_in_daemon_thread(update)
+        else:
+            # we don't wait for the future because this would block the current thread
+            prefetched_future.add_done_callback(
+                lambda future: update(_get_result_or_none(future))
+            )
 
-    def _update_tables(self):
+    def _update_databases(self, prefetched_databases=None):
+        if prefetched_databases is None:
+            self.database.options = self._list_databases()
+        else:
+            self.database.options = prefetched_databases
+
+    def _update_tables(self, prefetched_tables=None):
+        if (self.database.value, _metadata_cache_generation) == self._last_listed_database:
+            return  # the user selected the same database again
+        # read the generation before listing so that a cache clear during the listing is not missed
+        generation = _metadata_cache_generation
         try:
-            options = self._list_tables(self.database.value)
+            # the prefetched tables are from the default database and the user might already
+            # have selected another database in the meantime
+            if prefetched_tables is not None and self.database.value is None:
+                options = prefetched_tables
+            else:
+                options = self._list_tables(self.database.value)
             if options is DATABASE_DOES_NOT_EXIST:
+                self._last_listed_database = DATABASE_NOT_LISTED
                 self.table.options = []
-                msg = f"Database '{self.database.value}' does not exist. Most likely the database<br>" \
-                      "was recently deleted. Please select a different database."
-                self.database_hint_outlet.children = [notification(msg, type="error")]
+                _set_children(
+                    self.database_hint_outlet,
+                    [self._notifications.get(_database_missing_notification, self.database.value)],
+                )
             else:
-                self.database_hint_outlet.children = []
+                _set_children(self.database_hint_outlet, [])
                 self.table.options = options
+                self._last_listed_database = (self.database.value, generation)
         except Exception as e:
             print(repr(e), sys.stderr)
 
     def _list_databases(self):
-        return [result["databaseName"] for result in _spark.sql("show databases").collect()]
+        return _list_metadata("show databases", "databaseName")
 
     def _list_tables(self, database):
         if database is None:
-            cmd = "show tables"
-        elif _spark.catalog.databaseExists(database):
-            cmd = f"show tables from {database}"
-        else:
-            return DATABASE_DOES_NOT_EXIST
+            return _list_metadata("show tables", "tableName")
 
-        return [result["tableName"] for result in _spark.sql(cmd).collect()]
+        # We don't check catalog.databaseExists upfront because this would be another metastore request
+        try:
+            return _list_metadata(f"show tables from {_quote_identifier(database)}", "tableName")
+        except Exception as exception:
+            if _is_database_not_found_error(exception):
+                _clear_metadata_cache()
+                return DATABASE_DOES_NOT_EXIST
+            raise
 
     def is_valid_loader(self):
         if self.table.value is None:
@@ -109,6 +398,7 @@ class NonUCDatabaseLoader(widgets.VBox):
 
     def get_exception_message(self, exception):
         if "Table or view not found" in str(exception):
+            _clear_metadata_cache()
             database_name = (
                 self.database.value if self.database.value is not None else "default"
             )
@@ -123,37 +413,108 @@ class NonUCDatabaseLoader(widgets.VBox):
     def get_code(self):
         database_prefix = f"{self.database.value}." if self.database.value is not None else ""
 
-        row_limit_int = safe_cast(self.row_limit.value, int, ROW_LIMIT_DEFAULT)
+        row_limit_int = _row_limit_int(self.row_limit.value)
         spark_table = f'spark.table("{database_prefix}{self.table.value}")'
 
+        imports = ""
         if self.sample_style.value == READ_THE_FIRST:
             spark_df = f'{spark_table}.limit({row_limit_int})'
-        if self.sample_style.value == RANDOMLY_SAMPLE:
-            spark_df = f'spark.createDataFrame({spark_table}.rdd.takeSample(withReplacement=False, num={row_limit_int}))'
-        if self.sample_style.value == READ_THE_LAST:
-            spark_df = f'spark.createDataFrame({spark_table}.tail({row_limit_int}))'
-        
-        return f'{DF_NEW} = {spark_df}.toPandas()'
+        elif self.sample_style.value == RANDOMLY_SAMPLE:
+            # sample on the executors instead of collecting the rows via the rdd to the driver
+            imports = "from pyspark.sql import functions as F\n"
+            spark_df = f'{spark_table}.orderBy(F.rand()).limit({row_limit_int})'
+        elif self.sample_style.value == READ_THE_LAST:
+            # pass the schema so that spark does not need to infer it from the collected rows
+            spark_df = f'spark.createDataFrame({spark_table}.tail({row_limit_int}), schema={spark_table}.schema)'
+
+        return f'{imports}{ARROW_CONFIG_CODE}{DF_NEW} = {spark_df}.toPandas()'
+
+
+def _list_uc_tables(catalog, database):
+    return _list_metadata(
+        f"show tables in {_quote_identifier(catalog)}.{_quote_identifier(database)}",
+        "tableName",
+    )
+
+
+def _prefetch_uc_tables(catalog, database):
+    """Populate the metadata cache so that listing the tables is instant when the user selects the database"""
+    try:
+        _list_uc_tables(catalog, database)
+    except Exception:
+        pass  # the error will be shown if the user selects the database
+
+
+class _NotificationCache:
+    """
+    The error notifications are static, so each loader reuses them instead of creating new widgets for every error.
 
+    Attention: the cache belongs to a single loader instance because a widget that is shown
+    in the outlets of multiple loaders at the same time would be moved between the views.
+    The widgets are released together with the loader.
+    """
+
+    def __init__(self):
+        self._notifications = {}
+
+    def get(self, create_notification, *args):
+        """
+        :param create_notification: function that creates the notification widget from args
+        """
+        key = (create_notification, args)
+        if key not in self._notifications:
+            self._notifications[key] = create_notification(*args)
+        return self._notifications[key]
+
+
+def _unknown_error_notification():
+    return notification("There was an unknown error. You can close the user interface and try again.", type="error")
+
+
+def _database_missing_notification(database):
+    msg = f"Database '{database}' does not exist. Most likely the database<br>" \
+          "was recently deleted. Please select a different database."
+    return notification(msg, type="error")
+
+
+def _no_databases_notification(catalog):
+    return notification(f"There are no databases in {catalog} that you are allowed to see", type="error")
+
+
+def _no_tables_notification(catalog, database):
+    return notification(f"There are no tables in {catalog}.{database} that you are allowed to see", type="error")
+
+
+def _empty_input_notification(description):
+    return notification(f"{description} is empty. Please enter a value", type="warning")
+
+
+def _set_children(outlet, children):
+    """
+    Only assign the children if they changed because each assignment is synced to the frontend.
+    E.g. most callbacks clear a hint outlet that is already empty.
+    """
+    if list(outlet.children) != children:
+        outlet.children = children
 
-UNKNOWN_ERROR = notification("There was an unknown error. You can close the user interface and try again.", type="error")
 
 class UCDatabaseLoader(widgets.VBox):
     def __init__(self, transformation, catalogs):
         super().__init__()
         self.transformation = transformation
+        self._notifications = _NotificationCache()
 
         self.catalog = Singleselect(
             placeholder="Catalog",
             options=catalogs,
-            on_change=lambda _: self._maybe_update_databases(),
+            on_change=_debounced(lambda _: self._maybe_update_databases()),
             width="xl",
         )
 
         self.database = Singleselect(
             placeholder="Database/Schema",
             options=[],
-            on_change=lambda _: self._maybe_update_tables(),
+            on_change=_debounced(lambda _: self._maybe_update_tables()),
             width="xl",
         )
         self.database_hint_outlet = widgets.VBox()
@@ -174,6 +535,9 @@ class UCDatabaseLoader(widgets.VBox):
 
         self.general_error_outlet = widgets.VBox()
 
+        # (catalog, database, metadata cache generation) whose tables are currently listed
+        self._last_listed = None
+
         self.children = [
             create_description_widget("Catalog"),
             self.catalog,
@@ -194,42 +558,56 @@ class UCDatabaseLoader(widgets.VBox):
         if self.catalog.value is None:
             self.database.value = None
             self.database.options = []
-            self.database_hint_outlet.children = []
+            _set_children(self.database_hint_outlet, [])
         else:
             self._update_databases()
 
     def _update_databases(self):
         try:
-            databases = [result["databaseName"] for result in _spark.sql(f"show databases in {self.catalog.value}").collect()]
+            databases = _list_metadata(
+                f"show databases in {_quote_identifier(self.catalog.value)}", "databaseName"
+            )
             self.database.options = databases
             if len(databases) == 0:
                 self.database.value = None
-                self.database_hint_outlet.children = [notification(f"There are no databases in {self.catalog.value} that you are allowed to see", type="error")]
+                _set_children(self.database_hint_outlet, [self._notifications.get(_no_databases_notification, self.catalog.value)])
             else:
-                self.database_hint_outlet.children = []
+                _set_children(self.database_hint_outlet, [])
+                # warm the metadata cache while the user picks a database
+                execute_in_daemon_thread(_prefetch_uc_tables, self.catalog.value, databases[0])
         except Exception as exception:
-            self.database_hint_outlet.children = [UNKNOWN_ERROR]
+            _set_children(self.database_hint_outlet, [self._notifications.get(_unknown_error_notification)])
             self._print_error_to_stderr(exception)
             
     def _maybe_update_tables(self):
         if self.database.value is None:
+            self._last_listed = None
             self.table.value = None
             self.table.options = []
-            self.table_hint_outlet.children = []
-        else:
+            _set_children(self.table_hint_outlet, [])
+        elif (
+            self.catalog.value,
+            self.database.value,
+            _metadata_cache_generation,
+        ) != self._last_listed:
+            # we skip this if the user selected the same database again
             self._update_tables()
     
     def _update_tables(self):
         try:
-            tables = [result["tableName"] for result in _spark.sql(f"show tables in {self.catalog.value}.{self.database.value}").collect()]
+            catalog, database = self.catalog.value, self.database.value
+            # read the generation before listing so that a cache clear during the listing is not missed
+            generation = _metadata_cache_generation
+            tables = _list_uc_tables(catalog, database)
             self.table.options = tables
+            self._last_listed = (catalog, database, generation)
             if len(tables) == 0:
                 self.table.value = None
-                self.table_hint_outlet.children = [notification(f"There are no tables in {self.catalog.value}.{self.database.value} that you are allowed to see", type="error")]
+                _set_children(self.table_hint_outlet, [self._notifications.get(_no_tables_notification, catalog, database)])
             else:
-                self.table_hint_outlet.children = []
+                _set_children(self.table_hint_outlet, [])
         except Exception as exception:
-            self.table_hint_outlet.children = [UNKNOWN_ERROR]
+            _set_children(self.table_hint_outlet, [self._notifications.get(_unknown_error_notification)])
             self._print_error_to_stderr(exception)
             
     def _print_error_to_stderr(self, exception):
@@ -252,22 +630,19 @@ class UCDatabaseLoader(widgets.VBox):
         return None
 
     def get_code(self):
-        if self.row_limit.value == "":
-            row_limit_code = ""
-        else:
-            row_limit_int = safe_cast(self.row_limit.value, int, ROW_LIMIT_DEFAULT)
-            if row_limit_int <= 0:
-                row_limit_code = ""
-            else:
-                row_limit_code = f".limit({row_limit_int})"
+        row_limit_code = _row_limit_code(self.row_limit.value)
+        return f'{ARROW_CONFIG_CODE}{DF_NEW} = spark.table("{self.catalog.value}.{self.database.value}.{self.table.value}"){row_limit_code}.toPandas()'
+
 
-        return f'{DF_NEW} = spark.table("{self.catalog.value}.{self.database.value}.{self.table.value}"){row_limit_code}.toPandas()'
+UC_WORKAROUND_CODE_TEMPLATE = ARROW_CONFIG_CODE + """{df_name} = spark.table("{catalog}.{database}.{table}"){row_limit_code}.toPandas()
+{df_name}"""
 
 
 class UCWorkaroundLoader(widgets.VBox):
     def __init__(self, transformation):
         super().__init__()
         self.transformation = transformation
+        self._notifications = _NotificationCache()
         self.loader_hint = notification("""
         <b>Manual action needed:</b> bamboolib cannot load tables from Unity Catalog yet.<br>
         As a workaround, you can run the code in a notebook cell and then continue to use bamboolib.<br>
@@ -276,35 +651,40 @@ class UCWorkaroundLoader(widgets.VBox):
         type="info"
         )
 
+        # all inputs share a single debounced callback so that a burst of changes only updates the result once
+        update_result = _debounced(self._update_result)
+
         self.catalog = Text(
             description="Catalog",
-            on_change=self._update_result,
+            on_change=update_result,
             width="xl",
         )
         self.database = Text(
             description="Database/Schema",
-            on_change=self._update_result,
+            on_change=update_result,
             width="xl",
         )
         self.table = Text(
             description="Table",
-            on_change=self._update_result,
+            on_change=update_result,
             width="xl",
         )
         self.row_limit = Text(
             description="Row limit: read the first N rows - leave empty for no limit",
             placeholder="E.g. 1000",
             value=str(ROW_LIMIT_DEFAULT),
-            on_change=self._update_result,
+            on_change=update_result,
             width="xl",
         )
         self.dataframe_name = Text(
             description="Dataframe name",
             value = "df",
-            on_change=self._update_result,
+            on_change=update_result,
             width="xl",
         )
 
+        self._required_text_inputs = (self.catalog, self.database, self.table, self.dataframe_name)
+
         self.result_outlet = widgets.VBox([notification("The code is shown after you fill in the inputs.", type="info")])
 
         self.copy_button = CopyButton(style="primary")
@@ -322,40 +702,31 @@ class UCWorkaroundLoader(widgets.VBox):
         ]
 
     def _get_empty_text_input(self):
-        for text_input in [self.catalog, self.database, self.table, self.dataframe_name]:
-            if text_input.value == "":
-                return text_input
-        return None
+        return next(
+            (text_input for text_input in self._required_text_inputs if text_input.value == ""),
+            None,
+        )
 
     def _update_result(self, text_widget):
         empty_text_input = self._get_empty_text_input()
         if empty_text_input:
-            self.result_outlet.children = [notification(f"{empty_text_input.description} is empty. Please enter a value", type="warning")]
+            _set_children(self.result_outlet, [self._notifications.get(_empty_input_notification, empty_text_input.description)])
         else:
             code_string = self.get_code()
 
-            self.copy_button.copy_string = code_string
-            self.code_output.code = code_string
-            self.result_outlet.children = [
-                self.copy_button,
-                self.code_output,
-            ]
+            if code_string != self.code_output.code:
+                self.copy_button.copy_string = code_string
+                self.code_output.code = code_string
+            _set_children(self.result_outlet, [self.copy_button, self.code_output])
 
     def get_code(self):
-        if self.row_limit.value == "":
-            row_limit_code = ""
-        else:
-            row_limit_int = safe_cast(self.row_limit.value, int, ROW_LIMIT_DEFAULT)
-            if row_limit_int <= 0:
-                row_limit_code = ""
-            else:
-                row_limit_code = f".limit({row_limit_int})"
-
-        DF_NAME = self.dataframe_name.value
-        return f"""
-{DF_NAME} = spark.table("{self.catalog.value}.{self.database.value}.{self.table.value}"){row_limit_code}.toPandas()
-{DF_NAME}
-""".strip()
+        return UC_WORKAROUND_CODE_TEMPLATE.format(
+            df_name=self.dataframe_name.value,
+            catalog=self.catalog.value,
+            database=self.database.value,
+            table=self.table.value,
+            row_limit_code=_row_limit_code(self.row_limit.value),
+        )
 
 
 class DatabricksDatabaseTableLoader(LoaderPlugin):
@@ -368,36 +739,51 @@ class DatabricksDatabaseTableLoader(LoaderPlugin):
 
     def __init__(self, **kwargs):
         super().__init__(**kwargs)
-        if _spark is None:
+        if _get_spark() is None:
             return  # continue with render and show error message
         else:
             self.output_outlet = widgets.VBox()
             self.output_outlet.children = [widgets.HTML("Loading ...")]
-            Thread(target=self._setup_appropriate_loader).start()
+            execute_in_daemon_thread(self._setup_appropriate_loader)
 
     def _setup_appropriate_loader(self):
+        # The metadata requests are independent, so we run them in parallel. The databases and tables
+        # are fetched speculatively because the NonUCDatabaseLoader needs them right away
+        databases_future = _submit_to_daemon_thread(_list_metadata, "show databases", "databaseName")
+        tables_future = _submit_to_daemon_thread(_list_metadata, "show tables", "tableName")
+
         try:
-            catalogs = [result["catalog"] for result in _spark.sql("show catalogs").collect()]
+            catalogs = _list_metadata("show catalogs", "catalog")
             is_uc_workspace = len(catalogs) >= 1
             spark_queries_work_from_ipywidgets = True
         except:
             is_uc_workspace = True
             spark_queries_work_from_ipywidgets = False
 
+        # The loader widgets are constructed here, i.e. in a background thread and not on the main thread.
+        # We don't construct the widgets of a loader in parallel because ipywidgets are not
+        # thread-safe and the construction is bound by the GIL anyway
         if is_uc_workspace:
+            # we don't need the speculative requests any more
+            databases_future.cancel()
+            tables_future.cancel()
             if spark_queries_work_from_ipywidgets:
                 self.loader = UCDatabaseLoader(self, catalogs)
             else:
                 self.loader = UCWorkaroundLoader(self)
         else:
-            self.loader = NonUCDatabaseLoader(self)
+            self.loader = NonUCDatabaseLoader(
+                self,
+                prefetched_databases=databases_future,
+                prefetched_tables=tables_future,
+            )
 
         self.output_outlet.children = [self.loader]
 
     def render(self):
         self.set_title("Databricks: Load database table")
 
-        if _spark is None:
+        if _get_spark() is None:
             self.set_content(notification(
                 f"""This feature only works within the Databricks platform but it seems like you are currently outside of Databricks.<br>
                 Please only run this feature from within Databricks.""",
@@ -2,10 +2,68 @@
 # Distributed under the terms of the DB License (see https://databricks.com/db-license-source
 # for more information).
 
+import sys
 
-# each plugin type has its own list with the full names of the plugins, e.g.:
+
+class PluginOrder:
+    """
+    Ordered list of plugin names that additionally keeps an index from each name to its position.
+    This way, looking up the position of a plugin does not need to scan the list.
+    """
+
+    def __init__(self):
+        self.names = []
+        self.positions = {}
+
+    def __iter__(self):
+        return iter(self.names)
+
+    def __len__(self):
+        return len(self.names)
+
+    def _update_positions(self, start=0):
+        for position in range(start, len(self.names)):
+            self.positions[self.names[position]] = position
+
+    def index(self, name):
+        """
+        :return: int position of the plugin name. Raises ValueError if the name does not exist
+        """
+        try:
+            return self.positions[name]
+        except KeyError:
+            raise ValueError(f"{name} is not in the plugin list")
+
+    def append(self, name):
+        self.positions[name] = len(self.names)
+        self.names.append(name)
+
+    def insert(self, index, name):
+        """Same semantics as list.insert"""
+        self.names.insert(index, name)
+        # negative or too large indices are clipped like by list.insert
+        # so we only know that all positions from 0 might have changed
+        start = index if 0 <= index < len(self.names) else 0
+        self._update_positions(start)
+
+    def insert_before(self, other_name, name):
+        self.insert(self.index(other_name), name)
+
+    def insert_after(self, other_name, name):
+        self.insert(self.index(other_name) + 1, name)
+
+    def remove(self, name):
+        """Same semantics as list.remove"""
+        position = self.index(name)
+        del self.positions[name]
+        del self.names[position]
+        # only the positions of the following names changed
+        self._update_positions(position)
+
+
+# each plugin type has its own PluginOrder with the full names of the plugins, e.g.:
 # {
-#     "TransformationPlugin": ["SelectColumnsTransformation", ...],
+#     "TransformationPlugin": PluginOrder(["SelectColumnsTransformation", ...]),
 #     ...
 # }
 _all_plugin_types = {}
@@ -17,6 +75,10 @@ _all_plugin_types = {}
 # }
 _all_plugins = {}
 
+# a cache for the plugins of get_plugins with the structure plugin_type:tuple_of_plugin_classes
+# it is cleared whenever a plugin is registered
+_get_plugins_cache = {}
+
 
 # Info/Extension for later:
 # instead of passing the plugin_base_class, the user might later also be allowed
@@ -29,10 +91,17 @@ _all_plugins = {}
 def get_plugins(plugin_base_class):
     """
     Get all plugins for a given plugin base class
+
+    :return: list of plugin classes. It is a new list on each call, so callers may modify it
     """
     plugin_type = _get_full_class_name(plugin_base_class)
-    plugins_list = _all_plugin_types.get(plugin_type, [])
-    return [_all_plugins[plugin_name] for plugin_name in plugins_list]
+    plugins = _get_plugins_cache.get(plugin_type)
+    if plugins is None:
+        plugins_list = _all_plugin_types.get(plugin_type, PluginOrder())
+        plugins = tuple(_all_plugins[plugin_name] for plugin_name in plugins_list)
+        _get_plugins_cache[plugin_type] = plugins
+    # copying the cached tuple is cheap and keeps the public return type a list
+    return list(plugins)
 
 
 def _preprocess_plugin_class(plugin_class):
@@ -51,11 +120,29 @@ def _get_plugin_list(plugin_base_class):
         plugins_list = _all_plugin_types[plugin_type]
     else:
         # create and add new plugins_list for the plugin_type
-        plugins_list = []
+        plugins_list = PluginOrder()
         _all_plugin_types[plugin_type] = plugins_list
     return plugins_list
 
 
+_auth_context = None
+
+
+def _get_auth_context():
+    """
+    Returns the objects that are needed for the authorization check during `register`.
+    They are imported on the first call only due to circular imports.
+    """
+    global _auth_context
+    if _auth_context is None:
+        from IPython.display import display
+        from bamboolib._authorization import auth
+        from bamboolib.helper import AuthorizedPlugin, notification
+
+        _auth_context = (display, auth, AuthorizedPlugin, notification)
+    return _auth_context
+
+
 def register(plugin_base_class, plugin_class, index=None, before=None, after=None):
     """
     Register plugin e.g. `register(TransformationPlugin, MyTransformation)`
@@ -75,6 +162,17 @@ def register(plugin_base_class, plugin_class, index=None, before=None, after=Non
     plugins_list = _get_plugin_list(plugin_base_class)
     plugin_name = _get_full_class_name(plugin_class)
 
+    no_position_given = index is None and before is None and after is None
+    if (
+        no_position_given
+        and _all_plugins.get(plugin_name) is plugin_class
+        and len(plugins_list) > 0
+        and plugins_list.names[-1] == plugin_name
+    ):
+        # the same plugin class is already registered at the end, so there is nothing to do
+        # otherwise, the registration moves the plugin to the end
+        return
+
     if plugin_name in _all_plugins:
         pass  # No further auth check needed because the plugin was already added once
 
@@ -83,20 +181,9 @@ def register(plugin_base_class, plugin_class, index=None, before=None, after=Non
     else:
         # Check if user is allowed (authorized) to register the plugin
         # This code is inline so that it is harder to override for an attacker
-        from IPython.display import display
-        from bamboolib._authorization import auth
-        from bamboolib.helper import AuthorizedPlugin, notification
-
-        def is_authorized(plugin_class):
-            if issubclass(plugin_class, AuthorizedPlugin):
-                return True
+        display, auth, AuthorizedPlugin, notification = _get_auth_context()
 
-            if auth.has_unlimited_plugins():
-                return True
-
-            return False
-
-        if is_authorized(plugin_class):
+        if issubclass(plugin_class, AuthorizedPlugin) or auth.has_unlimited_plugins():
             pass
         else:
             display(
@@ -111,22 +198,28 @@ def register(plugin_base_class, plugin_class, index=None, before=None, after=Non
     if index is not None:
         plugins_list.insert(index, plugin_name)
     elif before is not None:
-        other_plugin_name = _get_full_class_name(before)
-        other_index = plugins_list.index(other_plugin_name)
-        plugins_list.insert(other_index, plugin_name)
+        plugins_list.insert_before(_get_full_class_name(before), plugin_name)
     elif after is not None:
-        other_plugin_name = _get_full_class_name(after)
-        other_index = plugins_list.index(other_plugin_name)
-        plugins_list.insert(other_index + 1, plugin_name)
+        plugins_list.insert_after(_get_full_class_name(after), plugin_name)
     else:
         plugins_list.append(plugin_name)
 
     # finally, actually add the plugin_class
     _all_plugins[plugin_name] = plugin_class
+    # the whole cache is cleared because a replaced plugin_class might be part of other plugin types
+    _get_plugins_cache.clear()
 
 
 def _get_full_class_name(cls):
     """
     Turn a class into a unique string based on its module and name.
+
+    The name is cached on the class because the registry needs it very often.
     """
-    return f"{cls.__module__}.{cls.__name__}"
+    # we use cls.__dict__ instead of getattr so that a subclass does not reuse the name of its base class
+    full_class_name = cls.__dict__.get("__plugin_fullname__")
+    if full_class_name is None:
+        # interned strings make the dict lookups and comparisons in the registry cheaper
+        full_class_name = sys.intern(f"{cls.__module__}.{cls.__name__}")
+        cls.__plugin_fullname__ = full_class_name
+    return full_class_name
@@ -17,10 +17,6 @@ def test_setup():
     import ipywidgets as widgets
     import pandas as pd
 
-    import ipyslickgrid
-    import plotly
-    import plotly.graph_objs as go
-
     import bamboolib as bam
     from bamboolib.widgets import Multiselect
 
@@ -31,22 +27,35 @@ def test_setup():
     display(widgets.Text("ipywidgets works"))
     print("")
     print("ipyslickgrid:")
-    print(f"Python library version is {ipyslickgrid.__version__}")
-    ipyslickgrid_df = pd.DataFrame.from_dict(
-        {"test ipyslickgrid": ["ipyslickgrid widget works"]}
-    )
-    display(
-        ipyslickgrid.show_grid(
-            ipyslickgrid_df, grid_options={"maxVisibleRows": 2, "minVisibleRows": 2}
+    # ipyslickgrid and plotly are imported in their own sections so that a missing library
+    # does not prevent the other sections from being tested
+    try:
+        import ipyslickgrid
+    except ImportError:
+        print("ipyslickgrid is not available")
+    else:
+        print(f"Python library version is {ipyslickgrid.__version__}")
+        ipyslickgrid_df = pd.DataFrame.from_dict(
+            {"test ipyslickgrid": ["ipyslickgrid widget works"]}
+        )
+        display(
+            ipyslickgrid.show_grid(
+                ipyslickgrid_df, grid_options={"maxVisibleRows": 2, "minVisibleRows": 2}
+            )
         )
-    )
 
     print("")
     print("plotly:")
-    print(f"Python library version is {plotly.__version__}")
-    trace = go.Bar(x=["Plotly", "works"], y=[1, 2])
-    layout = dict(height=350, width=500)
-    display(go.FigureWidget(data=[trace], layout=layout))
+    try:
+        import plotly
+        import plotly.graph_objs as go
+    except ImportError:
+        print("plotly is not available")
+    else:
+        print(f"Python library version is {plotly.__version__}")
+        trace = go.Bar(x=["Plotly", "works"], y=[1, 2])
+        layout = dict(height=350, width=500)
+        display(go.FigureWidget(data=[trace], layout=layout))
 
     print("")
     print("bamboolib:")
@@ -2,6 +2,8 @@
 # Distributed under the terms of the DB License (see https://databricks.com/db-license-source
 # for more information).
 
+from functools import lru_cache
+
 from bamboolib import __widgets_version__
 
 
@@ -12,6 +14,11 @@ JUPYTERLAB_MANAGER_VERSION_MAPPING = {
     "2.x": "2.0",
 }
 
+# the JupyterLab version patterns that are matched via the major and minor version e.g. 1.2 -> 1.2.x
+_MAJOR_MINOR_VERSION_TO_PATTERN = {"1.0": "1.0.x", "1.1": "1.1.x", "1.2": "1.2.x"}
+# the JupyterLab version patterns that are matched via the major version only e.g. 2 -> 2.x
+_MAJOR_VERSION_TO_PATTERN = {"2": "2.x"}
+
 
 class Version:
     """Helper class to work with version strings"""
@@ -23,6 +30,17 @@ class Version:
         self.major_minor = self.major + "." + self.minor
 
 
+@lru_cache(maxsize=1)
+def _get_jupyterlab_app_info() -> dict:
+    """
+    Returns the JupyterLab app info. It is cached because collecting it reads the JupyterLab installation.
+    Only use it for information that does not change while the extensions are installed e.g. the version.
+    """
+    from jupyterlab import commands
+
+    return commands.get_app_info()
+
+
 def install_nbextensions() -> None:
     """
     Installs the Jupyter Notebook extensions that are required for bamboolib
@@ -61,20 +79,15 @@ def install_labextensions() -> None:
         return
 
     def jupyterlab_version() -> str:
-        return commands.get_app_info()["version"]
+        return _get_jupyterlab_app_info()["version"]
 
     def get_jupyterlab_version_pattern(version_object) -> str:
         major_minor_version = version_object.major_minor
-        if major_minor_version == "1.0":
-            return "1.0.x"
-        elif major_minor_version == "1.1":
-            return "1.1.x"
-        elif major_minor_version == "1.2":
-            return "1.2.x"
-
-        major_version = version_object.major
-        if major_version == "2":
-            return "2.x"
+        pattern = _MAJOR_MINOR_VERSION_TO_PATTERN.get(
+            major_minor_version
+        ) or _MAJOR_VERSION_TO_PATTERN.get(version_object.major)
+        if pattern is not None:
+            return pattern
 
         raise Exception(
             "bamboolib does not support JupyterLab version %s. bamboolib only supports JupyterLab>=1.0. If you have troubles, please reach out to support@8080labs.com"
@@ -94,18 +107,17 @@ def install_labextensions() -> None:
 
         return __version__
 
-    def plotly_major_version_number():
-        return int(Version(plotly_version_str()).major)
+    plotly_version = plotly_version_str()
 
     extensions = [
         "ipyslickgrid",
-        "jupyterlab-plotly@%s" % plotly_version_str(),
+        "jupyterlab-plotly@%s" % plotly_version,
         "bamboolib@%s" % __widgets_version__,
     ]
 
-    if plotly_major_version_number() <= 4:
+    if int(Version(plotly_version).major) <= 4:
         # Before version 5, plotly needed another, additional extension to be installed
-        extensions.append("plotlywidget@%s" % plotly_version_str())
+        extensions.append("plotlywidget@%s" % plotly_version)
 
     # TODO: can this be removed altoghether because we now have ipywidgets>=7.6.*
     # as a requirement?
@@ -9,28 +9,56 @@ from bamboolib.config import get_option
 
 ERROR_LOG_FILE = BAMBOOLIB_LIBRARY_CONFIG_PATH / "ERROR_LOGS"
 
+
+class _LazyFileHandler(logging.Handler):
+    """
+    A handler that only creates the log folder and opens the ERROR_LOG_FILE when the first record is emitted.
+    This way, importing bamboolib does not touch the disk when nothing is logged.
+    """
+
+    def __init__(self):
+        super().__init__()
+        self.setFormatter(logging.Formatter("%(asctime)s %(levelname)s %(message)s"))
+        self._file_handler = None
+        self._is_disabled = False
+
+    def emit(self, record):
+        if self._is_disabled:
+            return
+        if self._file_handler is None:
+            try:
+                BAMBOOLIB_LIBRARY_CONFIG_PATH.mkdir(parents=True, exist_ok=True)
+                # the FileHandler will create a file if none exists BUT the folder has to exist
+                self._file_handler = logging.FileHandler(ERROR_LOG_FILE)
+            except OSError:
+                # e.g. the permission to create the directory or file was denied, the file system is
+                # read-only or there is no space left. In this case, the logger just wont log to a file
+                self._is_disabled = True
+                if get_option("global.log_errors"):
+                    self.handleError(record)
+                return
+            self._file_handler.setFormatter(self.formatter)
+        try:
+            self._file_handler.emit(record)
+        except Exception:
+            # same as logging.Handler: logging must never raise into the calling code
+            self.handleError(record)
+
+    def close(self):
+        if self._file_handler is not None:
+            self._file_handler.close()
+        super().close()
+
+
 file_logger = logging.getLogger("bamboolib.file_logger")
 file_logger.setLevel(logging.DEBUG)
-
-try:
-    BAMBOOLIB_LIBRARY_CONFIG_PATH.mkdir(parents=True, exist_ok=True)
-    # the FileHandler will create a file if none exists BUT the folder has to exist
-    handler = logging.FileHandler(ERROR_LOG_FILE)
-    formatter = logging.Formatter("%(asctime)s %(levelname)s %(message)s")
-    handler.setFormatter(formatter)
-    file_logger.addHandler(handler)
-except PermissionError:
-    # most likely the permission to create the directory or file were denied
-    # in this case, the logger just wont log to a file
-    if get_option("global.log_errors"):
-        file_logger.exception(
-            "PermissionError when trying to set the FileHandler for the file_loggger"
-        )
+file_logger.addHandler(_LazyFileHandler())
 
 
 def print_log_contents():
     """
     Prints all the contents of the log file.
+    The file is read line by line so that a large log file is not loaded into memory at once.
 
     Usage during error diagnosis:
     >>> bam.setup.file_logger.print_log_contents()
@@ -41,5 +69,8 @@ def print_log_contents():
     >>> with open(ERROR_LOG_FILE, "r") as file:
     >>>     print(file.read())
     """
+    if not ERROR_LOG_FILE.exists():
+        return  # the file is only created when the first record is logged, so there are no contents yet
     with open(ERROR_LOG_FILE, "r") as file:
-        print(file.read())
+        for line in file:
+            print(line, end="")
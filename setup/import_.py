@@ -24,28 +24,7 @@ log_jupyter_action("other", "JupyterCell", "import bamboolib")
 IPYTHON_STARTUP_FOLDER = Path.home() / ".ipython" / "profile_default" / "startup"
 STARTUP_FILE = IPYTHON_STARTUP_FOLDER / "bamboolib_autoimport.py"
 
-
-def _create_or_reset_startup_file():
-    if STARTUP_FILE.exists():
-        STARTUP_FILE.unlink()  # deletes the old file
-        # this is important if someone messed around with the file
-        # if he calls our method, he expects that we repair everything
-        # therefore, we delete the old file and write a new, valid version
-    STARTUP_FILE.touch()  # create a new file
-
-
-def _create_auto_startup_file(auto_import=False, extend_pandas_df=False):
-    auto_import_code = "import bamboolib as bam"
-    if not auto_import:
-        auto_import_code = f"# {auto_import_code}"
-
-    extend_pandas_df_code = "bam._enable_rich_pandas_df()"
-    if not extend_pandas_df:
-        extend_pandas_df_code = f"# {extend_pandas_df_code}"
-
-    with STARTUP_FILE.open("w") as file:
-        file.write(
-            f"""
+_AUTO_STARTUP_FILE_TEMPLATE = """
 # HOW TO DEACTIVATE AUTO-IMPORT:
 # if you dont want to auto-import bamboolib, you have two options:
 # 0) if you want to disable the auto-import but sometimes keep using bamboolib
@@ -59,7 +38,28 @@ try:
 except:
     pass
 """
-        )
+
+
+def _create_auto_startup_file(auto_import=False, extend_pandas_df=False):
+    auto_import_code = "import bamboolib as bam"
+    if not auto_import:
+        auto_import_code = f"# {auto_import_code}"
+
+    extend_pandas_df_code = "bam._enable_rich_pandas_df()"
+    if not extend_pandas_df:
+        extend_pandas_df_code = f"# {extend_pandas_df_code}"
+
+    content = _AUTO_STARTUP_FILE_TEMPLATE.format(
+        auto_import_code=auto_import_code,
+        extend_pandas_df_code=extend_pandas_df_code,
+    )
+    # if someone messed around with the file or deleted it and calls our method,
+    # he expects that we repair everything
+    # therefore, we compare the whole file with the valid version and only skip the write if they are equal
+    if STARTUP_FILE.exists() and STARTUP_FILE.read_text() == content:
+        return
+    # write_text creates the file or truncates an existing one
+    STARTUP_FILE.write_text(content)
 
 
 def maybe_print(message, should_print):
@@ -80,7 +80,6 @@ def _update_startup_file(auto_import=False, extend_pandas_df=False):
         return False
 
     try:
-        _create_or_reset_startup_file()
         _create_auto_startup_file(
             auto_import=auto_import, extend_pandas_df=extend_pandas_df
         )
@@ -149,7 +148,6 @@ def disable(print_messages=True):
 def _maybe_add_autostartup_file():
     if IPYTHON_STARTUP_FOLDER.exists() and (not STARTUP_FILE.exists()):
         try:
-            _create_or_reset_startup_file()
             _create_auto_startup_file(auto_import=False, extend_pandas_df=False)
         except:
             print("bamboolib error: unable to add autostartup file")
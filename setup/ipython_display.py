@@ -2,12 +2,15 @@
 # Distributed under the terms of the DB License (see https://databricks.com/db-license-source
 # for more information).
 
+import weakref
+
 from IPython.display import display
 from bamboolib.widgets.table_output import TableOutput
 import ipywidgets as widgets
 import pandas as pd
 
 from bamboolib.helper import (
+    execute_asynchronously,
     log_jupyter_action,
     log_action,
     log_databricks_funnel_event,
@@ -17,11 +20,61 @@ import bamboolib.config as _config
 from bamboolib.widgets import Button
 
 
+# cache of the variable name of each displayed df with the structure id(df):df_name
+# an entry is removed via weakref.finalize when its df is garbage collected
+# so that a new df with the same id does not get a stale name
+_df_name_by_id = {}
+
+
+def _get_df_name(df, symbols):
+    """
+    Get the variable name of the df from the user symbols.
+    The name is cached for redisplays of the same df and only looked up again when it is no longer valid.
+
+    :param df: pandas.Dataframe
+    :param symbols: dict - user namespace symbols
+
+    :return: str or None if the df is not available as a variable
+    """
+    df_id = id(df)
+    df_name = _df_name_by_id.get(df_id)
+    if df_name is not None and symbols.get(df_name, None) is df:
+        return df_name
+
+    possible_df_names = get_dataframe_variable_names(df, symbols)
+    if len(possible_df_names) == 0:
+        return None
+
+    df_name = possible_df_names[0]
+    if df_id not in _df_name_by_id:
+        weakref.finalize(df, _df_name_by_id.pop, df_id, None)
+    _df_name_by_id[df_id] = df_name
+    return df_name
+
+
+class _StaticDataframeDisplay:
+    """
+    Wrapper that exposes the pandas representations of a Dataframe to the IPython formatters.
+
+    IPython only calls the formatters that are active for the frontend e.g. a terminal does not
+    compute the expensive HTML representation.
+    We cannot pass the df itself to `display` because its _ipython_display_ is pandas_display_df.
+    """
+
+    def __init__(self, df):
+        self.df = df
+
+    def __repr__(self):
+        return self.df.__repr__()
+
+    def _repr_html_(self):
+        return self.df._repr_html_()
+
+
 def pandas_display_df(df, *args, **kwargs):
     log_jupyter_action("other", "JupyterCell", "pandas display(df)")
 
-    display_data = {"text/plain": df.__repr__(), "text/html": df._repr_html_()}
-    display(display_data, raw=True)
+    display(_StaticDataframeDisplay(df))
 
 
 class ToggleRow(widgets.HBox):
@@ -47,8 +100,14 @@ class ToggleRow(widgets.HBox):
 
         self.static_html = static_html
 
+        # the header widgets are created on first use and then reused by render
+        self._loading_widget = None
+        self._show_static_html_button = None
+        self._show_bamboolib_button = None
+
         if bamboolib_ui is None:
-            bamboolib_ui = self._get_loading_widget()
+            # a separate widget because the cached loading widget is used in the header
+            bamboolib_ui = widgets.HTML("bamboolib is loading ...")
         self.bamboolib_ui = bamboolib_ui
         self.bamboolib_ui_outlet = widgets.VBox([self.bamboolib_ui])
 
@@ -56,9 +115,16 @@ class ToggleRow(widgets.HBox):
         df_outlet.children = [static_html, self.bamboolib_ui_outlet]
 
     def _get_loading_widget(self):
-        return widgets.HTML("bamboolib is loading ...")
+        if self._loading_widget is None:
+            self._loading_widget = widgets.HTML("bamboolib is loading ...")
+        return self._loading_widget
 
     def _get_show_static_html_button(self):
+        if self._show_static_html_button is None:
+            self._show_static_html_button = self._create_show_static_html_button()
+        return self._show_static_html_button
+
+    def _create_show_static_html_button(self):
         def click(button):
             self.show_bamboolib_ui = False
             _config.SHOW_BAMBOOLIB_UI = False
@@ -77,24 +143,27 @@ class ToggleRow(widgets.HBox):
     def _get_show_bamboolib_button(self):
         if self.loading:
             return self._get_loading_widget()
-        else:
+        if self._show_bamboolib_button is None:
+            self._show_bamboolib_button = self._create_show_bamboolib_button()
+        return self._show_bamboolib_button
 
-            def click(button):
-                self.show_bamboolib_ui = True
-                _config.SHOW_BAMBOOLIB_UI = True
-                # Only show new version notification once per session
-                _config.SHOW_NEW_VERSION_NOTIFICATION = False
-                self.render()
-                self._maybe_notify_bamboolib_ui()
-                log_databricks_funnel_event("Show bamboolib UI - click")
-                log_action("general", "JupyterCell", "click 'Show bamboolib UI' button")
-
-            return Button(
-                description="Show bamboolib UI",
-                style="primary",
-                css_classes=["bamboolib-show-ui-button"],
-                on_click=click,
-            )
+    def _create_show_bamboolib_button(self):
+        def click(button):
+            self.show_bamboolib_ui = True
+            _config.SHOW_BAMBOOLIB_UI = True
+            # Only show new version notification once per session
+            _config.SHOW_NEW_VERSION_NOTIFICATION = False
+            self.render()
+            self._maybe_notify_bamboolib_ui()
+            log_databricks_funnel_event("Show bamboolib UI - click")
+            log_action("general", "JupyterCell", "click 'Show bamboolib UI' button")
+
+        return Button(
+            description="Show bamboolib UI",
+            style="primary",
+            css_classes=["bamboolib-show-ui-button"],
+            on_click=click,
+        )
 
     def render(self):
         if self.show_bamboolib_ui:
@@ -136,13 +205,16 @@ def display_rich_df(df, app):
     :param df: Dataframe
     :param app: ipywidget bamboolib app
     """
-    app_widget_data = {"model_id": app._model_id}
-    full_widget_data = {
-        "text/plain": df.__repr__(),
-        # "text/html": df._repr_html_(),
-        "application/vnd.jupyter.widget-view+json": app_widget_data,
-    }
-    display(full_widget_data, raw=True)
+    # text/plain stays eager because frontends without widget support (e.g. exported notebooks) show it
+    # its cost is bounded because pandas truncates the repr based on the display.max_rows option
+    display(
+        {
+            "text/plain": df.__repr__(),
+            # "text/html": df._repr_html_(),
+            "application/vnd.jupyter.widget-view+json": {"model_id": app._model_id},
+        },
+        raw=True,
+    )
 
 
 def bamboolib_display_df(df, *args, **kwargs):
@@ -172,8 +244,7 @@ def bamboolib_display_df(df, *args, **kwargs):
     # because otherwise the symbols cannot be retrieved via inspect
     # and the df identities and names might change in parallel/following code
     symbols = get_user_symbols()
-    possible_df_names = get_dataframe_variable_names(df, symbols)
-    df_name = None if len(possible_df_names) == 0 else possible_df_names[0]
+    df_name = _get_df_name(df, symbols)
 
     lazy_load_bamboolib_ui(df, toggle_row, symbols, df_name)
 
@@ -196,8 +267,8 @@ def lazy_load_bamboolib_ui(df, toggle_row, symbols, df_name):
             )
         )
 
-    from bamboolib.helper import execute_asynchronously
-
+    # Attention: each display starts its own daemon thread so that a slow UI load neither delays
+    # the other displays nor blocks the shutdown of the kernel
     execute_asynchronously(load_bamboolib_ui)
 
 
@@ -205,11 +276,14 @@ def extend_pandas_ipython_display():
     """
     Changes the representation of all pandas.Dataframes to use the interactive bamboolib representation
     """
-    pd.DataFrame._ipython_display_ = bamboolib_display_df
+    # only assign when needed because each class attribute assignment invalidates the type cache
+    if getattr(pd.DataFrame, "_ipython_display_", None) is not bamboolib_display_df:
+        pd.DataFrame._ipython_display_ = bamboolib_display_df
 
 
 def reset_pandas_ipython_display():
     """
     Reset the pandas.Dataframe representation to not include the rich bamboolib UI
     """
-    pd.DataFrame._ipython_display_ = pandas_display_df
+    if getattr(pd.DataFrame, "_ipython_display_", None) is not pandas_display_df:
+        pd.DataFrame._ipython_display_ = pandas_display_df
@@ -2,7 +2,10 @@
 # Distributed under the terms of the DB License (see https://databricks.com/db-license-source
 # for more information).
 
+import html
 import sys
+from collections import namedtuple
+from functools import partial
 from IPython.display import display
 from bamboolib.helper.utils import notification
 import ipywidgets as widgets
@@ -24,20 +27,15 @@ from bamboolib.helper import (
 from bamboolib.df_manager import DfManager
 from bamboolib.wrangler import Wrangler
 from bamboolib.widgets import Button
-from bamboolib.views.data_loader import (
-    CSVLoader,
-    CSVOptions,
-    ExcelLoader,
-    ExcelOptions,
-    CSVFromDBFSLoader,
-    ParquetOptions,
-    ParquetFromDBFSLoader,
-)
 from bamboolib.plugins import LoaderPlugin
 
 
-SHOW_ABOUT_INFO = False
+# an item of the Overview with the button description `name`, the `loader` class that is opened and the button `style`
+PluginItem = namedtuple("PluginItem", ["name", "loader", "style"])
 
+# cache for Overview._get_plugins with the structure (is_databricks, loader_plugins, plugin_items)
+# the plugin_items are still valid as long as LoaderPlugin.get_plugins() returns the same plugin classes
+_plugin_items_cache = None
 
 def setup_module_view(module_name):
     """
@@ -62,15 +60,42 @@ class BamboolibModuleWrapper:
     # the module view logic is inspired by
     # https://stackoverflow.com/questions/1725515/can-a-python-module-have-a-repr
 
+    # Attention: the wrapper cannot use __slots__ because it needs an instance __dict__
+    # The import system sets submodules as attributes on the module in sys.modules e.g. bam.views
+    # and the wrapper needs its own __doc__ which cannot be a slot because the class defines a docstring
+
     def __init__(self, original_module):
         super().__init__()
 
         # Attention: any attribute added to this class will automatically be exposed via bam
         self.__original_module__ = original_module
         self.__user_symbols__ = {}
-
-        for attribute in dir(self.__original_module__):
-            setattr(self, attribute, getattr(self.__original_module__, attribute))
+        # whether the about info is shown. It is stored on the wrapper so that
+        # all module windows share the state, e.g. when the user calls `bam` again
+        self._show_about_info = False
+        # the escaped module string is computed on first use and then reused by all module windows
+        self._module_string_for_html = None
+        # __doc__ needs to be set explicitly because otherwise the docstring of this class is found
+        self.__doc__ = original_module.__doc__
+
+    def _get_module_string_for_html(self):
+        if self._module_string_for_html is None:
+            self._module_string_for_html = html.escape(
+                str(self.__original_module__), quote=False
+            )
+        return self._module_string_for_html
+
+    def __getattr__(self, name):
+        # __getattr__ is only called for attributes that are not found on the wrapper itself
+        # so all other attributes are looked up on the original module when they are accessed
+        if name == "__original_module__":
+            # e.g. during copying, the attribute might not be set yet
+            raise AttributeError(name)
+        return getattr(self.__original_module__, name)
+
+    def __dir__(self):
+        # enables the autocompletion of the module attributes e.g. in Jupyter
+        return sorted(set(dir(self.__original_module__)) | set(self.__dict__))
 
     def _ipython_display_(self, *args, **kwargs):
         # getting the symbols needs to happen outside of a thread AND within Jupyter
@@ -80,6 +105,8 @@ class BamboolibModuleWrapper:
         # Attention: we always load a new window and don't show an existing one
         # This is important so that the user can always reset the view via calling bam again
         # Also, this enables us to maybe add a close button to the Window in the future
+        # A cached window cannot be reused: all outputs of the same widget are synced, so resetting
+        # the cached window would also reset e.g. an open Wrangler in the output of a previous cell
         display(BamboolibModuleWindow(self))
 
 
@@ -125,19 +152,11 @@ class AboutInfoToggle(widgets.VBox):
         self._module_outlet = module_outlet
         self.modal_outlet = module_outlet.modal_outlet
 
-        module_string_for_html = (
-            str(module_wrapper.__original_module__)
-            .replace("<", "&lt;")
-            .replace(">", "&gt;")
-        )
-        self.about_info = [
-            self._grey_html(f"bamboolib version {__version__}"),
-            self._grey_html(f"{module_string_for_html}"),
-        ]
+        # the about info is only created once the user opens it for the first time
+        self._about_info = None
 
         def toggle_hide_or_show(button):
-            global SHOW_ABOUT_INFO
-            SHOW_ABOUT_INFO = not SHOW_ABOUT_INFO
+            module_wrapper._show_about_info = not module_wrapper._show_about_info
             self.update()
 
         self.hide_or_show_about_info = Button(
@@ -150,12 +169,21 @@ class AboutInfoToggle(widgets.VBox):
         self.children = [self.hide_or_show_about_info, self.about_setting_outlet]
 
     def update(self):
+        show_about_info = self._module_wrapper._show_about_info
         self.hide_or_show_about_info.icon = (
-            "chevron-up" if SHOW_ABOUT_INFO else "chevron-down"
+            "chevron-up" if show_about_info else "chevron-down"
         )
-        content = self.about_info if SHOW_ABOUT_INFO else []
+        content = self._get_about_info() if show_about_info else []
         self.about_setting_outlet.children = content
 
+    def _get_about_info(self):
+        if self._about_info is None:
+            self._about_info = [
+                self._grey_html(f"bamboolib version {__version__}"),
+                self._grey_html(self._module_wrapper._get_module_string_for_html()),
+            ]
+        return self._about_info
+
     def _grey_html(self, text):
         return widgets.HTML(f"<p style='color:#808080'>{text}</p>")
 
@@ -172,26 +200,35 @@ class Overview(Viewable):
         self._module_outlet = module_outlet
         self.modal_outlet = module_outlet.modal_outlet
         self.about_info_toggle = AboutInfoToggle(module_wrapper, module_outlet)
+        # the separator never changes, so it is reused across renders
+        # Attention: each Overview has its own separator because a widget that is shown in multiple
+        # outputs at the same time might be moved between the views
+        self._separator = widgets.HTML("<hr>")
 
     def render(self):
+        # the buttons are passed to the constructor of the VBox so that the children are part of the
+        # initial state of the widget. Assigning them afterwards would send an additional update to the frontend
+        plugin_buttons = [
+            self._create_plugin_button(plugin) for plugin in self._get_plugins()
+        ]
         self.set_content(
-            widgets.VBox(
-                [self._create_plugin_button(plugin) for plugin in self._get_plugins()]
-            ),
-            widgets.HTML("<hr>"),
+            widgets.VBox(plugin_buttons),
+            self._separator,
             self.about_info_toggle,
         )
 
     def _create_plugin_button(self, plugin):
-        # Attention: this code had to be moved to this separate function
-        # (instead of using it inline in the list comprehension above)
-        # The reason was that only in this way does the on_click lambda capture the correct `plugin` object
+        # Attention: the loader is bound via partial instead of a lambda inside the list comprehension in render
+        # This way, each on_click callback receives the correct loader object
         return Button(
-            description=plugin["name"],
-            style=plugin["style"],
-            on_click=lambda _: self._open_plugin(plugin["loader"]),
+            description=plugin.name,
+            style=plugin.style,
+            on_click=partial(self._on_plugin_click, plugin.loader),
         )
 
+    def _on_plugin_click(self, loader, button):
+        self._open_plugin(loader)
+
     def _open_plugin(self, loader):
         loader(
             symbols=self._module_wrapper.__user_symbols__,
@@ -199,73 +236,97 @@ class Overview(Viewable):
         ).render_in(self.modal_outlet)
 
     def _get_plugins(self):
-        base_loader_plugins = []
-        if auth.is_databricks():
-            base_loader_plugins += [
-                {
-                    "name": "Databricks: Read CSV file from DBFS",
-                    "loader": ReadCSVFromDBFS,
-                    "style": "primary",
-                },
-                {
-                    "name": "Databricks: Read Parquet file from DBFS",
-                    "loader": ReadParquetFromDBFS,
-                    "style": "secondary",
-                }
+        global _plugin_items_cache
+        is_databricks = auth.is_databricks()
+        loader_plugins = LoaderPlugin.get_plugins()
+        if (
+            _plugin_items_cache is not None
+            and _plugin_items_cache[0] == is_databricks
+            and _plugin_items_cache[1] == loader_plugins
+        ):
+            return _plugin_items_cache[2]
+
+        plugin_items = self._get_base_loader_plugins(
+            is_databricks
+        ) + self._get_loader_plugins(loader_plugins)
+        _plugin_items_cache = (is_databricks, loader_plugins, plugin_items)
+        return plugin_items
+
+    def _get_base_loader_plugins(self, is_databricks):
+        if is_databricks:
+            return [
+                PluginItem(
+                    name="Databricks: Read CSV file from DBFS",
+                    loader=ReadCSVFromDBFS,
+                    style="primary",
+                ),
+                PluginItem(
+                    name="Databricks: Read Parquet file from DBFS",
+                    loader=ReadParquetFromDBFS,
+                    style="secondary",
+                ),
             ]
         else:
-            base_loader_plugins += [
-                {
-                    "name": "Read CSV file",
-                    "loader": ReadCSV,
-                    "style": "primary",
-                },
-                {"name": "Read Excel file", "loader": ReadExcel, "style": "secondary"},
+            return [
+                PluginItem(name="Read CSV file", loader=ReadCSV, style="primary"),
+                PluginItem(name="Read Excel file", loader=ReadExcel, style="secondary"),
             ]
 
-        return base_loader_plugins + self._get_loader_plugins()
-
-    def _get_loader_plugins(self):
+    def _get_loader_plugins(self, loader_plugins):
         plugin_items = []
-        for plugin in LoaderPlugin.get_plugins():
-            try:
-                plugin_items.append(
-                    {"name": plugin.name, "loader": plugin, "style": "secondary"}
-                )
-            except:
-                pass
+        for plugin in loader_plugins:
+            name = getattr(plugin, "name", None)
+            if name is None:
+                continue
+            plugin_items.append(PluginItem(name=name, loader=plugin, style="secondary"))
         return plugin_items
 
 
-# To be refactored to a LoaderPlugin. See also ReadExcel.
-class ReadCSV(TabViewable):
+class FileLoaderTab(TabViewable):
     """
-    A Loader to read a CSV file
+    Base class for the loaders that read a file and open the result in a Wrangler
+
+    The subclasses define the `title` and create the file loader widget via `create_file_loader`.
+    They import the data loaders inline because those are only needed once the user opens the loader.
     """
 
+    title = ""
+
     def __init__(self, symbols, parent_outlet, **kwargs):
         super().__init__(**kwargs)
-        self.csv_loader = CSVLoader(CSVOptions, on_open_file=self.open_csv)
+        self.file_loader = self.create_file_loader(on_open_file=self.open_file)
         self.symbols = symbols
         self._parent_outlet = parent_outlet
 
         self.df_manager = None
 
+    def create_file_loader(self, on_open_file):
+        """
+        MUST be overriden
+
+        :param on_open_file: function that receives the kwargs df_name and code when the file is opened
+        :return: the file loader widget
+        """
+        raise NotImplementedError
+
     def render(self):
-        self.set_title("Read CSV")
-        self.set_content(self.csv_loader)
+        self.set_title(self.title)
+        self.set_content(self.file_loader)
 
     @show_loader_and_maybe_error_modal
-    def open_csv(self, df_name=None, code=None):
+    def open_file(self, df_name=None, code=None):
         if_new_df_name_is_invalid_raise_error(df_name)
         if self.df_manager is None:
-            # this is the first execution of the ReadCSV
+            # this is the first execution of the loader
             initial_user_code = None  # we do not know the initial_user_code
         else:
-            # this is a subsequent execution of ReadCSV
+            # this is a subsequent execution of the loader
             # we restore initial_user_code to overwrite potential code changes in the cell from the old DfManager
             initial_user_code = self.df_manager.get_initial_user_code()
 
+        # Attention: we execute the generated code instead of calling e.g. pd.read_csv directly
+        # This guarantees that the code which is shown to the user is exactly the code that created the df
+        # Compared to reading the file, the cost of compiling this single line is negligible
         code = f"{df_name} = {code}\n"
         df = exec_code(code, symbols=self.symbols, result_name=df_name)
 
@@ -286,142 +347,56 @@ class ReadCSV(TabViewable):
 
 
 # To be refactored to a LoaderPlugin. See also ReadExcel.
-class ReadCSVFromDBFS(TabViewable):
+class ReadCSV(FileLoaderTab):
     """
-    A Loader to read a CSV file from DBFS
+    A Loader to read a CSV file
     """
 
-    def __init__(self, symbols, parent_outlet, **kwargs):
-        super().__init__(**kwargs)
-        self.csv_loader = CSVFromDBFSLoader(CSVOptions, on_open_file=self.open_csv)
-        self.symbols = symbols
-        self._parent_outlet = parent_outlet
+    title = "Read CSV"
 
-        self.df_manager = None
+    def create_file_loader(self, on_open_file):
+        from bamboolib.views.data_loader import CSVLoader, CSVOptions
 
-    def render(self):
-        self.set_title("Read CSV from DBFS")
-        self.set_content(self.csv_loader)
+        return CSVLoader(CSVOptions, on_open_file=on_open_file)
 
-    @show_loader_and_maybe_error_modal
-    def open_csv(self, df_name=None, code=None):
-        if_new_df_name_is_invalid_raise_error(df_name)
-        if self.df_manager is None:
-            # this is the first execution of the ReadCSV
-            initial_user_code = None  # we do not know the initial_user_code
-        else:
-            # this is a subsequent execution of ReadCSV
-            # we restore initial_user_code to overwrite potential code changes in the cell from the old DfManager
-            initial_user_code = self.df_manager.get_initial_user_code()
 
-        code = f"{df_name} = {code}\n"
-        df = exec_code(code, symbols=self.symbols, result_name=df_name)
+# To be refactored to a LoaderPlugin. See also ReadExcel.
+class ReadCSVFromDBFS(FileLoaderTab):
+    """
+    A Loader to read a CSV file from DBFS
+    """
+
+    title = "Read CSV from DBFS"
+
+    def create_file_loader(self, on_open_file):
+        from bamboolib.views.data_loader import CSVFromDBFSLoader, CSVOptions
+
+        return CSVFromDBFSLoader(CSVOptions, on_open_file=on_open_file)
 
-        self.df_manager = DfManager(
-            df,
-            self.symbols,
-            setup_code=code,
-            df_name=df_name,
-            initial_user_code=initial_user_code,
-        )
-        tab_section = TabSection(self.df_manager)
-        tab_section.add_tab(self, closable=False)
-        tab_section.add_tab(
-            Wrangler(df_manager=self.df_manager, parent_tabs=tab_section),
-            closable=False,
-        )
-        self._parent_outlet.children = [tab_section]
 
 # To be refactored to a LoaderPlugin. See also ReadExcel.
-class ReadParquetFromDBFS(TabViewable):
+class ReadParquetFromDBFS(FileLoaderTab):
     """
     A Loader to read a Parquet file from DBFS
     """
 
-    def __init__(self, symbols, parent_outlet, **kwargs):
-        super().__init__(**kwargs)
-        self.parquet_loader = ParquetFromDBFSLoader(ParquetOptions, on_open_file=self.open_parquet)
-        self.symbols = symbols
-        self._parent_outlet = parent_outlet
+    title = "Read Parquet from DBFS"
 
-        self.df_manager = None
+    def create_file_loader(self, on_open_file):
+        from bamboolib.views.data_loader import ParquetFromDBFSLoader, ParquetOptions
 
-    def render(self):
-        self.set_title("Read Parquet from DBFS")
-        self.set_content(self.parquet_loader)
+        return ParquetFromDBFSLoader(ParquetOptions, on_open_file=on_open_file)
 
-    @show_loader_and_maybe_error_modal
-    def open_parquet(self, df_name=None, code=None):
-        if_new_df_name_is_invalid_raise_error(df_name)
-        if self.df_manager is None:
-            # this is the first execution of the ReadParquetFromDBFS
-            initial_user_code = None  # we do not know the initial_user_code
-        else:
-            # this is a subsequent execution of ReadParquetFromDBFS
-            # we restore initial_user_code to overwrite potential code changes in the cell from the old DfManager
-            initial_user_code = self.df_manager.get_initial_user_code()
-
-        code = f"{df_name} = {code}\n"
-        df = exec_code(code, symbols=self.symbols, result_name=df_name)
-
-        self.df_manager = DfManager(
-            df,
-            self.symbols,
-            setup_code=code,
-            df_name=df_name,
-            initial_user_code=initial_user_code,
-        )
-        tab_section = TabSection(self.df_manager)
-        tab_section.add_tab(self, closable=False)
-        tab_section.add_tab(
-            Wrangler(df_manager=self.df_manager, parent_tabs=tab_section),
-            closable=False,
-        )
-        self._parent_outlet.children = [tab_section]
 
 # To be refactored to a LoaderPlugin. See also ReadCSV.
-class ReadExcel(TabViewable):
+class ReadExcel(FileLoaderTab):
     """
     A Loader to read an Excel file
     """
 
-    def __init__(self, symbols, parent_outlet, **kwargs):
-        super().__init__(**kwargs)
-        self.excel_loader = ExcelLoader(ExcelOptions, on_open_file=self.open_excel)
-        self.symbols = symbols
-        self._parent_outlet = parent_outlet
-
-        self.df_manager = None
-
-    def render(self):
-        self.set_title("Read Excel")
-        self.set_content(self.excel_loader)
+    title = "Read Excel"
 
-    @show_loader_and_maybe_error_modal
-    def open_excel(self, df_name=None, code=None):
-        if_new_df_name_is_invalid_raise_error(df_name)
-        if self.df_manager is None:
-            # this is the first execution of the ReadExcel
-            initial_user_code = None  # we do not know the initial_user_code
-        else:
-            # this is a subsequent execution of ReadExcel
-            # we restore initial_user_code to overwrite potential code changes in the cell from the old DfManager
-            initial_user_code = self.df_manager.get_initial_user_code()
-
-        code = f"{df_name} = {code}\n"
-        df = exec_code(code, symbols=self.symbols, result_name=df_name)
+    def create_file_loader(self, on_open_file):
+        from bamboolib.views.data_loader import ExcelLoader, ExcelOptions
 
-        self.df_manager = DfManager(
-            df,
-            self.symbols,
-            setup_code=code,
-            df_name=df_name,
-            initial_user_code=initial_user_code,
-        )
-        tab_section = TabSection(self.df_manager)
-        tab_section.add_tab(self, closable=False)
-        tab_section.add_tab(
-            Wrangler(df_manager=self.df_manager, parent_tabs=tab_section),
-            closable=False,
-        )
-        self._parent_outlet.children = [tab_section]
+        return ExcelLoader(ExcelOptions, on_open_file=on_open_file)
@@ -2,6 +2,21 @@
 # Distributed under the terms of the DB License (see https://databricks.com/db-license-source
 # for more information).
 
+import sys
+
+
+def _iterate_frame_globals():
+    """
+    Yields the globals of all frames on the current call stack, starting with the innermost frame.
+
+    This only follows the f_back references. In contrast, inspect.stack() also reads the
+    source code context of every frame which is not needed here.
+    """
+    frame = sys._getframe(1)
+    while frame is not None:
+        yield frame.f_globals
+        frame = frame.f_back
+
 
 def get_user_symbols():
     """
@@ -9,25 +24,19 @@ def get_user_symbols():
 
     ATTENTION: this function does not work when the code is called from a thread!
     """
-    import inspect
     from bamboolib import _environment as env
 
     if env.TESTING_MODE:
         # When we are running the bamboolib tests, we need to get the symbols from another frame
-        for index, item in enumerate(inspect.stack()):
-            try:
-                name = item[0].f_globals["__name__"]
-                if name.startswith("test_"):
-                    return item[0].f_globals
-            except:  # __name__ attribute does not exist
-                pass
+        for frame_globals in _iterate_frame_globals():
+            name = frame_globals.get("__name__")
+            if isinstance(name, str) and name.startswith("test_"):
+                return frame_globals
     else:
         # When bamboolib is run by the user, we get the symbols from the __main__ script
-        for index, item in enumerate(inspect.stack()):
-            try:
-                name = item[0].f_globals["__name__"]
-                if name == "__main__":
-                    return item[0].f_globals
-            except:  # __name__ attribute does not exist
-                pass
+        # Attention: the result is not cached because the __main__ namespace can change
+        # e.g. `%run script.py` executes the script in a new namespace
+        for frame_globals in _iterate_frame_globals():
+            if frame_globals.get("__name__") == "__main__":
+                return frame_globals
     return {}
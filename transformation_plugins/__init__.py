@@ -2,6 +2,10 @@
 # Distributed under the terms of the DB License (see https://databricks.com/db-license-source
 # for more information).
 
+# Attention: the plugins are imported eagerly on purpose
+# importing a plugin module registers its plugins via TransformationPlugin.__init_subclass__
+# and the wrangler imports this package so that all plugins are available in the search
+
 from bamboolib.transformation_plugins.bulk_change_datatype import BulkChangeDatatype
 
 from bamboolib.transformation_plugins.drop_columns_with_missing_values import (
@@ -2,12 +2,15 @@
 # Distributed under the terms of the DB License (see https://databricks.com/db-license-source
 # for more information).
 
+from functools import lru_cache
+
 import ipywidgets as widgets
 
 from pandas.api.types import is_datetime64_any_dtype
 
 from bamboolib.plugins import TransformationPlugin, DF_OLD, DF_NEW, Singleselect, Text
 
+from bamboolib.config import get_option
 from bamboolib.helper import log_error, string_to_code, AuthorizedPlugin
 from bamboolib.transformations.columns_selector import ColumnsSelector
 from bamboolib.transformations.dtype_transformer import DATETIME_FORMAT_HELP_TEXT
@@ -89,6 +92,27 @@ class DatetimeToStringOptionsEmbeddable(DatetimeOptionsEmbeddable):
 ADVANCED_SECTION_SEPARATOR = "advanced section separator"
 
 
+@lru_cache(maxsize=1)
+def _has_pyarrow_dtypes() -> bool:
+    """Returns True if pyarrow is installed and pandas supports pyarrow-backed dtypes like int64[pyarrow]"""
+    try:
+        import pyarrow
+        import pandas as pd
+    except ImportError:
+        return False
+    return hasattr(pd, "ArrowDtype")
+
+
+def _use_pyarrow_dtypes() -> bool:
+    return get_option("global.use_pyarrow_dtypes") and _has_pyarrow_dtypes()
+
+
+def _get_string_dtype_code() -> str:
+    # the pyarrow-backed strings are stored in one contiguous buffer instead of an array of Python objects
+    # which makes the cast faster and needs less memory
+    return "'string[pyarrow]'" if _use_pyarrow_dtypes() else "'string'"
+
+
 class DefaultHandler:
     """
     Base class for casting data types. Inherit from DefaultHandler for specifing cases.
@@ -97,11 +121,19 @@ class DefaultHandler:
     """
 
     default_code_template = "TO BE OVERRIDEN"
+    # code of the dtype for casting all columns with a single astype call e.g. "'float64'"
+    # None if the handler cannot cast all columns at once
+    astype_dtype_code = None
+    # string of the dtype that the cast always results in e.g. "datetime64[ns]"
+    # if set, columns that already have this dtype are skipped when they are overwritten
+    target_dtype = None
 
     def __init__(self, columns, source_dtype, has_na):
         self.columns = columns
         self.source_dtype = source_dtype
         self.has_na = has_na
+        # the source dtype does not change, so the dtype check is done only once
+        self.is_datetime_source = is_datetime64_any_dtype(source_dtype)
 
         self.embeddable_kwargs = {}
 
@@ -136,12 +168,25 @@ class DefaultHandler:
         kwargs = self.kwargs_to_string(option_section.get_kwargs())
         return self.__class__.default_code_template % (COLUMN_NAME_PLACEHOLDER, kwargs)
 
+    def get_bulk_code(self, option_section, columns_code):
+        """
+        Returns the code for casting all columns with a single astype call or None if this is not supported.
+        A single call is faster than casting the columns one by one, especially for many columns.
+
+        :param option_section: object. The options Embeddable that has a get_kwargs() method.
+        :param columns_code: string. The code of the selected columns
+        """
+        if self.astype_dtype_code is None:
+            return None
+        kwargs = self.kwargs_to_string(option_section.get_kwargs())
+        return f"{DF_OLD}[{columns_code}].astype({self.astype_dtype_code}{kwargs})"
+
 
 class ToString(DefaultHandler):
     """Handles casting data type(s) to string."""
 
     def get_options_embeddable(self):
-        if is_datetime64_any_dtype(self.source_dtype):
+        if self.is_datetime_source:
             return DatetimeToStringOptionsEmbeddable
         return NoOptionsEmbeddable
 
@@ -149,20 +194,27 @@ class ToString(DefaultHandler):
         date_format = option_section.get_kwargs().get("date_format", "")
         date_format = string_to_code(date_format)
 
-        if is_datetime64_any_dtype(self.source_dtype) and date_format != "":
+        if self.is_datetime_source and date_format != "":
             return self._get_datetime_code(date_format=date_format)
         else:
-            return f"""{DF_OLD}[{COLUMN_NAME_PLACEHOLDER}].astype('string')"""  # pandas > 1.1.x
+            return f"""{DF_OLD}[{COLUMN_NAME_PLACEHOLDER}].astype({_get_string_dtype_code()})"""  # pandas > 1.1.x
             # return f"pd.Series({DF_OLD}['{self.columns}'].apply(str), dtype='string')"  # pandas 1.0.x < 1.1
             # # old syntax pre pandas 1.0 which does not work from int to str any more
             # # maybe they will make the API consistent later on:
             # https://github.com/pandas-dev/pandas/issues/35174
             # return f"{DF_OLD}['{self.columns'].astype(str)"  # old syntax does not work any more in panas
 
+    def get_bulk_code(self, option_section, columns_code):
+        if self.is_datetime_source and option_section.get_kwargs().get(
+            "date_format", ""
+        ):
+            return None  # the datetime columns are formatted one by one via the dt accessor
+        return f"{DF_OLD}[{columns_code}].astype({_get_string_dtype_code()})"
+
     def _get_datetime_code(self, date_format):
         """Helper that returns code for casting to string if the columns to cast are datetimes"""
         # dt.strftime() returns object dtype (pandas 1.1.2), so need to apply .astype('string') on top
-        return f"{DF_OLD}[{COLUMN_NAME_PLACEHOLDER}].dt.strftime({date_format}).astype('string')"
+        return f"{DF_OLD}[{COLUMN_NAME_PLACEHOLDER}].dt.strftime({date_format}).astype({_get_string_dtype_code()})"
 
 
 class ToNullableInt(DefaultHandler):
@@ -175,18 +227,46 @@ class ToNullableInt(DefaultHandler):
 
     bit_size = "TO BE OVERRIDDEN"
 
-    def get_code(self, option_section, *args, **kwargs):
-        kwargs = self.kwargs_to_string(option_section.get_kwargs())
+    def _get_nullable_dtype_code(self):
+        if _use_pyarrow_dtypes():
+            # the pyarrow-backed integers support missing values and are cast via Arrow's kernels
+            # which are faster than the masked arrays of the nullable Int dtypes
+            return f"'int{self.__class__.bit_size}[pyarrow]'"
+        # Note that we need quotes around Int here!
+        return f"'Int{self.__class__.bit_size}'"
+
+    def _get_numpy_dtype_code(self):
         # We don't want to confuse non-techies with bit-sizes if they "just want to convert to integer"
         bit_size = "" if self.__class__.bit_size == 64 else self.__class__.bit_size
+        return f"'int{bit_size}'"
 
+    def _get_astype_dtype_code(self, kwargs):
         if self.has_na:
-            # Note that we need quotes around Int here!
-            return f"{DF_OLD}[{COLUMN_NAME_PLACEHOLDER}].astype('Int{self.__class__.bit_size}'{kwargs})"
+            return f"{self._get_nullable_dtype_code()}{kwargs}"
         else:
-            return (
-                f"{DF_OLD}[{COLUMN_NAME_PLACEHOLDER}].astype('int{bit_size}'{kwargs})"
-            )
+            return f"{self._get_numpy_dtype_code()}{kwargs}"
+
+    def _has_na_in_some_columns(self):
+        """
+        True if multiple columns are cast and some of them contain missing values.
+        Then, the dtype is chosen per column so that the columns without missing values get the faster numpy integers.
+        """
+        return self.has_na and len(self.columns) > 1
+
+    def get_code(self, option_section, *args, **kwargs):
+        kwargs = self.kwargs_to_string(option_section.get_kwargs())
+        if self._has_na_in_some_columns():
+            dtype_code = f"{self._get_nullable_dtype_code()} if {DF_OLD}[{COLUMN_NAME_PLACEHOLDER}].hasnans else {self._get_numpy_dtype_code()}"
+            return f"{DF_OLD}[{COLUMN_NAME_PLACEHOLDER}].astype({dtype_code}{kwargs})"
+        dtype_code = self._get_astype_dtype_code(kwargs)
+        return f"{DF_OLD}[{COLUMN_NAME_PLACEHOLDER}].astype({dtype_code})"
+
+    def get_bulk_code(self, option_section, columns_code):
+        if self._has_na_in_some_columns():
+            return None  # the dtype is chosen column by column
+        kwargs = self.kwargs_to_string(option_section.get_kwargs())
+        dtype_code = self._get_astype_dtype_code(kwargs)
+        return f"{DF_OLD}[{columns_code}].astype({dtype_code})"
 
 
 class ToInt64(ToNullableInt):
@@ -206,46 +286,71 @@ class ToInt8(ToNullableInt):
 
 
 class ToUnsignedInt64(DefaultHandler):
-    default_code_template = f"{DF_OLD}[%s].astype('uint64'%s)"
+    astype_dtype_code = "'uint64'"
+    default_code_template = f"{DF_OLD}[%s].astype({astype_dtype_code}%s)"
 
 
 class ToUnsignedInt32(DefaultHandler):
-    default_code_template = f"{DF_OLD}[%s].astype('uint32'%s)"
+    astype_dtype_code = "'uint32'"
+    default_code_template = f"{DF_OLD}[%s].astype({astype_dtype_code}%s)"
 
 
 class ToUnsignedInt16(DefaultHandler):
-    default_code_template = f"{DF_OLD}[%s].astype('uint16'%s)"
+    astype_dtype_code = "'uint16'"
+    default_code_template = f"{DF_OLD}[%s].astype({astype_dtype_code}%s)"
 
 
 class ToUnsignedInt8(DefaultHandler):
-    default_code_template = f"{DF_OLD}[%s].astype('uint8'%s)"
+    astype_dtype_code = "'uint8'"
+    default_code_template = f"{DF_OLD}[%s].astype({astype_dtype_code}%s)"
 
 
 class ToFloat64(DefaultHandler):
-    default_code_template = f"{DF_OLD}[%s].astype('float64'%s)"
+    astype_dtype_code = "'float64'"
+    default_code_template = f"{DF_OLD}[%s].astype({astype_dtype_code}%s)"
 
 
 class ToFloat32(DefaultHandler):
-    default_code_template = f"{DF_OLD}[%s].astype('float32'%s)"
+    astype_dtype_code = "'float32'"
+    default_code_template = f"{DF_OLD}[%s].astype({astype_dtype_code}%s)"
 
 
 class ToFloat16(DefaultHandler):
-    default_code_template = f"{DF_OLD}[%s].astype('float16'%s)"
+    astype_dtype_code = "'float16'"
+    default_code_template = f"{DF_OLD}[%s].astype({astype_dtype_code}%s)"
 
 
 class ToBool(DefaultHandler):
-    default_code_template = f"{DF_OLD}[%s].astype(bool%s)"
+    astype_dtype_code = "bool"
+    default_code_template = f"{DF_OLD}[%s].astype({astype_dtype_code}%s)"
 
 
 class ToCategory(DefaultHandler):
-    default_code_template = f"{DF_OLD}[%s].astype('category'%s)"
+    astype_dtype_code = "'category'"
+    default_code_template = f"{DF_OLD}[%s].astype({astype_dtype_code}%s)"
 
 
 class ToObject(DefaultHandler):
-    default_code_template = f"{DF_OLD}[%s].astype('object'%s)"
+    astype_dtype_code = "'object'"
+    default_code_template = f"{DF_OLD}[%s].astype({astype_dtype_code}%s)"
+
+
+class ToDowncastInteger(DefaultHandler):
+    """Casts to the smallest integer dtype that fits all values. Columns with missing values stay floats."""
+
+    default_code_template = f"pd.to_numeric({DF_OLD}[%s], downcast='integer'%s)"
+
+
+class ToDowncastFloat(DefaultHandler):
+    """Casts to the smallest float dtype (at least float32) that fits all values."""
+
+    default_code_template = f"pd.to_numeric({DF_OLD}[%s], downcast='float'%s)"
 
 
 class ToDatetime(DefaultHandler):
+    target_dtype = "datetime64[ns]"
+    # Attention: we do not add cache=True to the code because it is the default of pd.to_datetime
+    # The cache parses each unique string only once which is fast for columns with many duplicate dates
     default_code_template = (
         f"pd.to_datetime({DF_OLD}[%s], %s)"  # infer_datetime_format=True,
     )
@@ -255,6 +360,7 @@ class ToDatetime(DefaultHandler):
 
 
 class ToTimedelta(DefaultHandler):
+    target_dtype = "timedelta64[ns]"
     default_code_template = f"pd.to_timedelta({DF_OLD}[%s]%s)"
 
 
@@ -291,20 +397,28 @@ DTYPE_TRANSFORMATION = {
     "int32": {"name": "Integer (32-bit)", "handler": ToInt32},
     "int16": {"name": "Integer (16-bit)", "handler": ToInt16},
     "int8": {"name": "Integer (8-bit)", "handler": ToInt8},
+    "int_auto": {"name": "Integer (smallest fitting)", "handler": ToDowncastInteger},
     "float32": {"name": "Float (32-bit)", "handler": ToFloat32},
     "float16": {"name": "Float (16-bit)", "handler": ToFloat16},
+    "float_auto": {"name": "Float (smallest fitting)", "handler": ToDowncastFloat},
     "uint64": {"name": "Unsigned integer (64-bit)", "handler": ToUnsignedInt64},
     "uint32": {"name": "Unsigned integer (32-bit)", "handler": ToUnsignedInt32},
     "uint16": {"name": "Unsigned integer (16-bit)", "handler": ToUnsignedInt16},
     "uint8": {"name": "Unsigned integer (8-bit)", "handler": ToUnsignedInt8},
 }
 DTYPE_CHOICES = [
-    (DTYPE_TRANSFORMATION[key]["name"], key) for key in DTYPE_TRANSFORMATION.keys()
+    (transformation["name"], key) for key, transformation in DTYPE_TRANSFORMATION.items()
 ]
 
 
 def has_na(df) -> bool:
-    return df.isnull().values.any()
+    # check column by column so that we can stop at the first column with missing values
+    # in addition, Series.hasnans returns False right away for dtypes that cannot hold NAs e.g. int or bool
+    # and does not create a boolean mask of the whole DataFrame
+    for _, series in df.items():
+        if series.hasnans:
+            return True
+    return False
 
 
 class DtypeSelector(widgets.VBox):
@@ -313,49 +427,89 @@ class DtypeSelector(widgets.VBox):
     depending on the data type the user wants to cast to.
     """
 
-    def __init__(self, transformation, df, columns):
+    def __init__(self, transformation, df, columns, columns_have_na=None):
         super().__init__()
         self.transformation = transformation
         self.df = df
+        # callable that returns if the given columns contain missing values
+        # BulkChangeDatatype passes a cached version so that the columns are not scanned again
+        self._columns_have_na = (
+            columns_have_na
+            if columns_have_na is not None
+            else (lambda columns: has_na(df[columns]))
+        )
+
+        self.dropdown = Singleselect(
+            options=DTYPE_CHOICES,
+            set_soft_value=True,
+            focus_after_init=False,
+            width="md",
+            on_change=lambda widget: self._update_options_section(
+                focus_after_init=True
+            ),
+        )
+        # the children of the DtypeSelector stay the same and only the options section is swapped
+        # so that the dropdown is not sent to the frontend again on every change
+        self._option_holder = widgets.VBox()
+        self.children = [self.dropdown, self._option_holder]
 
-        self.columns = columns if len(columns) > 0 else [df.columns[0]]
+        self.update_columns(columns)
+
+    def update_columns(self, columns):
+        """
+        Update the selected columns and the options section. The dropdown is reused.
+
+        :param columns: list of column names.
+        """
+        self.columns = columns if len(columns) > 0 else [self.df.columns[0]]
 
         def get_source_dtype(df, column_names):
             """Get the source data type of the selected columns."""
-            unique_dtypes = df[column_names].dtypes.unique()
-            if len(unique_dtypes) > 1:
-                # Stable fix for all target data types if selected columns have multiple dtypes.
-                return "string"
-            else:
-                return unique_dtypes[0]
-
-        self.has_na = has_na(df[self.columns])
+            try:
+                # compare the dtypes column by column so that we do not need to create a DataFrame
+                # with the selected columns and can stop at the first different dtype
+                source_dtype = df[column_names[0]].dtype
+                for column_name in column_names[1:]:
+                    if df[column_name].dtype != source_dtype:
+                        # Stable fix for all target data types if selected columns have multiple dtypes.
+                        return "string"
+                return source_dtype
+            except AttributeError:
+                # df[column_name] is a DataFrame if the column name is duplicated
+                unique_dtypes = df[column_names].dtypes.unique()
+                if len(unique_dtypes) > 1:
+                    return "string"
+                else:
+                    return unique_dtypes[0]
+
+        # Attention: has_na is only computed when a handler needs it because it scans the columns
+        self._has_na = None
         self.old_column_dtype = get_source_dtype(self.df, self.columns)
 
-        if not str(self.old_column_dtype) in DTYPE_TRANSFORMATION.keys():
+        if str(self.old_column_dtype) not in DTYPE_TRANSFORMATION:
             log_error(
                 "missing feature",
                 self,
                 f"unavailable column dtype: {self.old_column_dtype}",
             )
 
-        self.dropdown = Singleselect(
-            options=DTYPE_CHOICES,
-            set_soft_value=True,
-            focus_after_init=False,
-            width="md",
-            on_change=lambda widget: self._update_options_section(
-                focus_after_init=True
-            ),
-        )
-
         self._update_options_section(focus_after_init=False)
 
+    @property
+    def has_na(self):
+        """Whether the selected columns contain missing values. The result is cached until the columns change."""
+        if self._has_na is None:
+            self._has_na = self._columns_have_na(self.columns)
+        return self._has_na
+
     def _update_options_section(self, focus_after_init=None):
         """Depending on the chosen datatype, find and display the correct options section."""
         HandlerClass = DTYPE_TRANSFORMATION[self.dropdown.value]["handler"]
         self.dtype_change_handler = HandlerClass(
-            columns=self.columns, source_dtype=self.old_column_dtype, has_na=self.has_na
+            columns=self.columns,
+            source_dtype=self.old_column_dtype,
+            # only the nullable integers depend on missing values
+            has_na=self.has_na if issubclass(HandlerClass, ToNullableInt) else None,
         )
 
         embeddable = self.dtype_change_handler.get_options_embeddable()
@@ -366,7 +520,7 @@ class DtypeSelector(widgets.VBox):
             focus_after_init=focus_after_init,
             **embeddable_kwargs,
         )
-        self.children = [self.dropdown, self.option_section]
+        self._option_holder.children = [self.option_section]
 
     def get_description(self):
         dtype_name = DTYPE_TRANSFORMATION[self.dropdown.value]["name"]
@@ -375,14 +529,27 @@ class DtypeSelector(widgets.VBox):
     def get_code(self):
         return self.dtype_change_handler.get_code(self.option_section)
 
+    def get_bulk_code(self, columns_code):
+        return self.dtype_change_handler.get_bulk_code(self.option_section, columns_code)
+
+    def get_target_dtype(self):
+        return self.dtype_change_handler.target_dtype
+
     def get_metainfos(self):
         from_ = self.old_column_dtype
         to_ = self.dropdown.value
-        return {
+        metainfos = {
             f"dtype_change_from_{from_}": True,
             f"dtype_change_to_{to_}": True,
             "dtype_change_pair": f"{from_} to {to_}",
         }
+        HandlerClass = DTYPE_TRANSFORMATION[to_]["handler"]
+        if _use_pyarrow_dtypes() and (
+            (issubclass(HandlerClass, ToNullableInt) and self.has_na)
+            or issubclass(HandlerClass, ToString)
+        ):
+            metainfos[f"dtype_change_to_{to_}_pyarrow"] = True
+        return metainfos
 
 
 class BulkChangeDatatype(AuthorizedPlugin, TransformationPlugin):
@@ -398,6 +565,10 @@ class BulkChangeDatatype(AuthorizedPlugin, TransformationPlugin):
 
         self.old_dtype_output = widgets.HTML()
         self.dtype_selector_wrapper = widgets.VBox()
+        self.dtype_selector = None
+        # column name -> whether the column contains missing values
+        # the df of the plugin does not change, so each column is scanned at most once
+        self._has_na_cache = {}
 
         self.new_column_name_suffix_input = Text(
             description="Suffix of new column name - empty for overwriting column(s)",
@@ -427,12 +598,28 @@ class BulkChangeDatatype(AuthorizedPlugin, TransformationPlugin):
 
         self._update_dtype_selector()
 
+    def _columns_have_na(self, columns):
+        df = self.get_df()
+        for column in columns:
+            if column not in self._has_na_cache:
+                # df[[column]] also works if the column name is duplicated
+                self._has_na_cache[column] = has_na(df[[column]])
+            if self._has_na_cache[column]:
+                return True
+        return False
+
     def _update_dtype_selector(self, *args, **kwargs):
-        """Rerender DtypeSelector"""
-        self.dtype_selector = DtypeSelector(
-            transformation=self, df=self.get_df(), columns=self.columns_input.value
-        )
-        self.dtype_selector_wrapper.children = [self.dtype_selector]
+        """Update the DtypeSelector to the selected columns. It is only created once."""
+        if self.dtype_selector is None:
+            self.dtype_selector = DtypeSelector(
+                transformation=self,
+                df=self.get_df(),
+                columns=self.columns_input.value,
+                columns_have_na=self._columns_have_na,
+            )
+            self.dtype_selector_wrapper.children = [self.dtype_selector]
+        else:
+            self.dtype_selector.update_columns(self.columns_input.value)
 
     def render(self):
         self.set_title(self.__class__.name)
@@ -451,7 +638,31 @@ class BulkChangeDatatype(AuthorizedPlugin, TransformationPlugin):
     def get_code(self):
         import textwrap
 
+        columns_code = self.columns_input.get_columns_code()
         suffix = string_to_code(self.new_column_name_suffix_input.value)
+
+        # we try to cast all columns with a single astype call
+        # Attention: this changes the behavior when the cast fails for one of the columns:
+        # the single call raises before any column is assigned while the loop below
+        # already overwrote the columns before the failing one
+        # We do not cast in bulk if column names are duplicated because then df[cols] selects
+        # more columns than the assignment expects
+        bulk_code = (
+            self.dtype_selector.get_bulk_code(columns_code)
+            if self.get_df().columns.is_unique
+            else None
+        )
+        if bulk_code is not None:
+            if self.new_column_name_suffix_input.value == "":
+                return f"{DF_OLD}[{columns_code}] = {bulk_code}"
+            # Attention: we do not use pd.concat with add_suffix because this would duplicate
+            # already existing columns with the suffix instead of overwriting them
+            # The cast columns are renamed via set_axis because some pandas versions align the
+            # assigned DataFrame by column name instead of position
+            # the list of new column names is inlined so that the code does not add a variable to the user's namespace
+            new_column_names_code = f"[{COLUMN_NAME_PLACEHOLDER} + {suffix} for {COLUMN_NAME_PLACEHOLDER} in {columns_code}]"
+            return f"{DF_OLD}[{new_column_names_code}] = {bulk_code}.set_axis({new_column_names_code}, axis=1)"
+
         if (
             self.new_column_name_suffix_input.value != ""
         ):  # suffix is never == "" after applying string_to_code on it
@@ -459,9 +670,20 @@ class BulkChangeDatatype(AuthorizedPlugin, TransformationPlugin):
         else:
             column_name_code_with_suffix = COLUMN_NAME_PLACEHOLDER
 
+        target_dtype = self.dtype_selector.get_target_dtype()
+        if self.new_column_name_suffix_input.value == "" and target_dtype is not None:
+            # skip the columns that already have the target dtype because the cast would only copy them
+            return textwrap.dedent(
+                f"""
+                for {COLUMN_NAME_PLACEHOLDER} in {columns_code}:
+                    if str({DF_OLD}[{COLUMN_NAME_PLACEHOLDER}].dtype) != '{target_dtype}':
+                        {DF_OLD}[{COLUMN_NAME_PLACEHOLDER}] = {self.dtype_selector.get_code()}
+            """
+            ).strip()
+
         final_code = textwrap.dedent(
             f"""
-            for {COLUMN_NAME_PLACEHOLDER} in {self.columns_input.get_columns_code()}:
+            for {COLUMN_NAME_PLACEHOLDER} in {columns_code}:
                 {DF_OLD}[{column_name_code_with_suffix}] = {self.dtype_selector.get_code()}
         """
         ).strip()
@@ -2,8 +2,14 @@ import re
 import ipywidgets as widgets
 from bamboolib.plugins import TransformationPlugin, DF_OLD, Text, BamboolibError
 from bamboolib.helper import notification
+from bamboolib.helper.databricks import ARROW_CONFIG_CODE
 
 FORBIDDEN_CHARACTERS = """?! "'-%$&\<\>\\/§`*+#;:.^"""
+# matches any of the FORBIDDEN_CHARACTERS in a single pass
+FORBIDDEN_CHARACTERS_REGEX = re.compile("[" + re.escape(FORBIDDEN_CHARACTERS) + "]")
+TABLE_ALREADY_EXISTS_REGEX = re.compile("Table(.+)already exists")
+DATABASE_NOT_FOUND_TOKENS = ("Database", "not found")
+INVALID_COLUMN_NAMES_TOKENS = ("Found invalid character", "in the column names")
 OVERWRITE_TABLE_LABEL = "Overwrite table if it already exists"
 OVERWRITE_SCHEMA_LABEL = "Overwrite existing table schema"
 
@@ -42,50 +48,50 @@ class DatabricksWriteToDatabaseTable(TransformationPlugin):
             )
 
         for input in [self.database, self.table]:
-            for character in list(FORBIDDEN_CHARACTERS):
-                if character in input.value:
-                    if character == " ":
-                        character = "whitespace"
-
-                    input_description = input.description
-                    if input is self.database:
-                        input_description = "database"
-                    else:  # input is self.table
-                        input_description = "table"
-
-                    raise BamboolibError(
-                        f"""
-                    The {input_description} name contains a <b>{character}</b> character. This is not allowed.<br>
-                    Please remove the character and make sure that neither the Database nor the Table name contain any of the following characters:<br>
-                    <b>{FORBIDDEN_CHARACTERS}</b>
-                    """
-                    )
+            match = FORBIDDEN_CHARACTERS_REGEX.search(input.value)
+            if match:
+                character = match.group(0)
+                if character == " ":
+                    character = "whitespace"
+
+                input_description = input.description
+                if input is self.database:
+                    input_description = "database"
+                else:  # input is self.table
+                    input_description = "table"
+
+                raise BamboolibError(
+                    f"""
+                The {input_description} name contains a <b>{character}</b> character. This is not allowed.<br>
+                Please remove the character and make sure that neither the Database nor the Table name contain any of the following characters:<br>
+                <b>{FORBIDDEN_CHARACTERS}</b>
+                """
+                )
         return True
 
     def get_exception_message(self, exception):
-        if "'spark' is not defined" in str(exception):
+        exception_message = str(exception)
+
+        if "'spark' is not defined" in exception_message:
             return notification(
                 f"It seems like you are not within Databricks. This feature only works within the Databricks platform.",
                 type="error",
             )
 
-        if all(s in str(exception) for s in ["Database", "not found"]):
+        if all(s in exception_message for s in DATABASE_NOT_FOUND_TOKENS):
             return notification(
                 """It seems like the database does not exist yet.<br>
                 Please write to a database that already exists or create a new database.""",
                 type="error",
             )
 
-        if re.compile("Table(.+)already exists").match(str(exception)):
+        if TABLE_ALREADY_EXISTS_REGEX.match(exception_message):
             return notification(
                 f"The table already exists. If you want to overwrite the existing table, please select the <b>{OVERWRITE_TABLE_LABEL}</b> option.",
                 type="error",
             )
 
-        if all(
-            s in str(exception)
-            for s in ["Found invalid character", "in the column names"]
-        ):
+        if all(s in exception_message for s in INVALID_COLUMN_NAMES_TOKENS):
             return notification(
                 """There are invalid characters e.g. " ,;{}()\\n\\t=" in the column names.<br>
                 Please remove the invalid characters via renaming the column names.<br>
@@ -94,8 +100,9 @@ class DatabricksWriteToDatabaseTable(TransformationPlugin):
                 type="error",
             )
 
-        if "A schema mismatch detected when writing to the Delta table" in str(
-            exception
+        if (
+            "A schema mismatch detected when writing to the Delta table"
+            in exception_message
         ):
             return notification(
                 f"""The existing table has a different schema than your current table.<br>
@@ -103,7 +110,7 @@ class DatabricksWriteToDatabaseTable(TransformationPlugin):
                 <br>
                 <br>
                 <b>You can compare the schemas as part of the following error message:</b>
-                {str(exception)}""",
+                {exception_message}""",
                 type="error",
             )
         return None
@@ -124,4 +131,5 @@ class DatabricksWriteToDatabaseTable(TransformationPlugin):
             '.option("mergeSchema", "true")' if self.overwrite_schema.value else ""
         )
         database_prefix = f"{self.database.value}." if self.database.value != "" else ""
-        return f"""spark.createDataFrame({DF_OLD}).write{overwrite}{merge_schema}.saveAsTable("{database_prefix}{self.table.value}")"""
+        # the Arrow config also speeds up spark.createDataFrame for pandas DataFrames
+        return f"""{ARROW_CONFIG_CODE}spark.createDataFrame({DF_OLD}).write{overwrite}{merge_schema}.saveAsTable("{database_prefix}{self.table.value}")"""
@@ -46,4 +46,6 @@ class DropColumnsWithMissingValues(AuthorizedPlugin, TransformationPlugin):
         return "<b>Drop columns with missing values</b>"
 
     def get_code(self):
+        # Attention: dropna(axis=1) already reduces the missing values column-wise (via count)
+        # An alternative like df.loc[:, ~df.isna().any()] creates the same full mask, so we keep the readable code
         return f"{DF_NEW} = {DF_OLD}.dropna(how='{self.drop_na_option.value}', axis=1)"
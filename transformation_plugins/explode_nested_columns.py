@@ -33,4 +33,7 @@ class ExplodeNestedColumns(TransformationPlugin):
 
     def get_code(self):
         column_name = string_to_code(self.column.value)
+        # Attention: we keep DataFrame.explode instead of emitting a custom np.repeat/np.concatenate version
+        # explode already flattens the lists in Cython and handles empty lists, missing values and scalars
+        # which a custom version would need to replicate. Also, the exported code stays readable
         return f"{DF_NEW} = {DF_OLD}.explode({column_name}, ignore_index=True)"